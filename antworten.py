@@ -0,0 +1,121 @@
+# Kompakter Antwortzustand einer Session
+#
+# Jede Session hält ihre Antworten in genau einem int8-Vektor: ein Slot je Kriterium
+# (Index = Item-ID des Modells), dahinter ein Slot je direkter Eingabevariable aus
+# "Abschließende Fragen" (Reihenfolge wie direct_input_keys). 0 heißt "unbeantwortet",
+# sonst steht der Score 1..4 im Slot.
+#
+# Mittelwerte je Handlungsfeld, Eingaben der Clusterzuordnung und Spalten der
+# Speicherzeile werden bei Bedarf daraus abgeleitet und nicht zusätzlich im
+# Session-State abgelegt.
+
+import numpy as np
+
+from scoring import direct_input_keys
+
+UNBEANTWORTET = 0
+DIREKT_VARIABLEN = tuple(direct_input_keys)
+
+
+def neu(modell):
+    return np.zeros(len(modell.items) + len(DIREKT_VARIABLEN), dtype=np.int8)
+
+
+def direkt_slot(modell, variable):
+    return len(modell.items) + DIREKT_VARIABLEN.index(variable)
+
+
+def setzen(vektor, slot, score):
+    # Fehlende oder ungültige Werte (None, NaN) gelten als unbeantwortet
+    if score is None or score != score:
+        vektor[slot] = UNBEANTWORTET
+    else:
+        vektor[slot] = int(score)
+
+
+def item_scores(vektor, modell):
+    # Scores als Float-Array mit NaN für unbeantwortete Items, dazu die Maske der beantworteten.
+    # Wie direkt_werte auch für eine Matrix (ein Vektor je Zeile) verwendbar.
+    items = vektor[..., :len(modell.items)]
+    beantwortet = items != UNBEANTWORTET
+    return np.where(beantwortet, items, np.nan), beantwortet
+
+
+def direkt_werte(vektor, modell):
+    direkt = vektor[..., len(modell.items):].astype(float)
+    direkt[direkt == UNBEANTWORTET] = np.nan
+    return direkt
+
+
+def feldmittel(vektor, modell):
+    # Handlungsfeld -> Mittelwert der beantworteten Items; Felder ohne Antwort fehlen
+    mittel = {}
+    for name, feld in modell.felder.items():
+        werte = vektor[feld.item_ids]
+        werte = werte[werte != UNBEANTWORTET]
+        if werte.size:
+            mittel[name] = float(werte.mean())
+    return mittel
+
+
+def item_spalten(vektor, modell):
+    return {
+        f"ITEM::{item.code}": float(vektor[item.id])
+        for item in modell.items
+        if vektor[item.id] != UNBEANTWORTET
+    }
+
+
+def direkt_spalten(vektor, modell):
+    werte = direkt_werte(vektor, modell)
+    return {
+        f"KAT::{variable}": None if np.isnan(wert) else float(wert)
+        for variable, wert in zip(DIREKT_VARIABLEN, werte)
+    }
+
+
+def zaehle_bewertete_clustervariablen(mtok_daten):
+    # Anzahl bewerteter MTOK-Felder zählen
+    werte = list(mtok_daten.values())[:9]  # Nur die 9 MTOK-Felder
+    return sum(1 for v in werte if isinstance(v, (int, float)) and v > 0)
+
+
+def speicherzeile(vektor, modell, status, session_id, zeitstempel, cluster_result=None,
+                  abweichungen_detail=None, evaluation=None):
+    # Spalten einer gespeicherten Zeile (vor Schema.normalisieren); fehlende Werte als 99999
+    daten_gesamt = {}
+
+    # Einzelne Itemwerte (Spalte je Item-Code, Grundlage von reliabilitaet.py) und direkte Eingabevariablen
+    daten_gesamt.update(item_spalten(vektor, modell))
+    daten_gesamt.update(direkt_spalten(vektor, modell))
+
+    # MTOK-Mittelwerte je Handlungsfeld
+    mittel = feldmittel(vektor, modell)
+    mtok_werte = {feld: mittel.get(feld, 99999.0) for feld in modell.felder}
+    daten_gesamt.update(mtok_werte)
+
+    # Cluster-Zuordnung – bei Zwischenstand etwas „entschärfen“
+    ohne_cluster = {f"Abweichung {i}": 99999 for i in range(1, len(modell.cluster) + 1)}
+    if status == "Final":
+        bewertete = zaehle_bewertete_clustervariablen(mtok_werte)
+        if isinstance(cluster_result, str) and isinstance(abweichungen_detail, dict) and bewertete >= 7:
+            # Abweichungen nach Clusternummer (Reihenfolge der Clusterprofile)
+            cluster_scores = {
+                "Zugeordnetes Cluster": cluster_result,
+                **{f"Abweichung {c.nummer}": abweichungen_detail.get(name) for name, c in modell.cluster.items()}
+            }
+        else:
+            cluster_scores = {
+                "Zugeordnetes Cluster": f"Bitte bewerten Sie mindestens 7 relevante Kriterien-Sets (Cluster-Variablen) für eine präzise Clusterzuordnung. Aktuell sind {bewertete} bewertet.",
+                **ohne_cluster,
+            }
+    else:
+        # Bei Zwischenstand keine „harte“ Clusterbewertung erzwingen
+        cluster_scores = {"Zugeordnetes Cluster": "Zwischenstand – noch nicht final berechnet", **ohne_cluster}
+    daten_gesamt.update(cluster_scores)
+    daten_gesamt.update(evaluation or {})
+
+    daten_gesamt["Zeitstempel"] = zeitstempel
+    daten_gesamt["Session_ID"] = session_id
+    daten_gesamt["Status"] = status
+    return daten_gesamt
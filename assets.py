@@ -0,0 +1,123 @@
+# Vorverarbeitete statische Grafiken (Clusterbilder, Logos)
+#
+# Die Originaldateien werden einmal verkleinert und neu komprimiert und unter static/
+# abgelegt, von wo Streamlit sie direkt ausliefert (server.enableStaticServing).
+# Die Dateinamen enthalten einen Hash über Quelle und Einstellungen; eine URL ändert
+# sich also nie inhaltlich und kann vom Browser bzw. Proxy dauerhaft gecacht werden.
+#
+# Erzeugt wird beim ersten Seitenaufruf (get_assets in app.py) oder vorab beim Build:
+#   python assets.py
+
+import hashlib
+import json
+import os
+import re
+import sys
+from io import BytesIO
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+STATIC_PFAD = "app/static/"
+WEBP_QUALITAET = 82
+
+# Quelle -> maximale Breite in Pixeln (doppelte Anzeigebreite für hochauflösende Bildschirme).
+# SVG wird unverändert übernommen.
+QUELLEN = {
+    "Cluster 1.png": 800,
+    "Cluster 2.png": 800,
+    "Cluster 3.png": 800,
+    "Cluster 4.png": 800,
+    "HAW-Logo.png": 400,
+    "kit-logo-en.svg": None,
+}
+
+
+def _name(quelle, inhalt, breite):
+    stamm = re.sub(r"[^a-z0-9]+", "-", os.path.splitext(quelle)[0].lower()).strip("-")
+    kennung = hashlib.sha256(inhalt + f"|{breite}|{WEBP_QUALITAET}".encode()).hexdigest()[:10]
+    endung = ".svg" if breite is None else ".webp"
+    return f"{stamm}.{kennung}{endung}"
+
+
+def _verkleinern(inhalt, breite):
+    from PIL import Image
+
+    bild = Image.open(BytesIO(inhalt))
+    if bild.width > breite:
+        hoehe = round(bild.height * breite / bild.width)
+        bild = bild.resize((breite, hoehe), Image.LANCZOS)
+
+    buf = BytesIO()
+    bild.save(buf, format="WEBP", quality=WEBP_QUALITAET, method=6)
+    return buf.getvalue()
+
+
+def erzeuge_assets(quellen=QUELLEN, ziel=STATIC_DIR, basis=None):
+    basis = basis or os.path.dirname(os.path.abspath(__file__))
+    os.makedirs(ziel, exist_ok=True)
+
+    manifest = {}
+    for quelle, breite in quellen.items():
+        with open(os.path.join(basis, quelle), "rb") as f:
+            inhalt = f.read()
+
+        name = _name(quelle, inhalt, breite)
+        pfad = os.path.join(ziel, name)
+        if not os.path.exists(pfad):
+            daten = inhalt if breite is None else _verkleinern(inhalt, breite)
+            tmp = pfad + ".tmp"
+            with open(tmp, "wb") as f:
+                f.write(daten)
+            os.replace(tmp, pfad)
+
+        manifest[quelle] = {"datei": name, "original": len(inhalt), "optimiert": os.path.getsize(pfad)}
+
+    # Veraltete Varianten entfernen (nur selbst erzeugte Dateien)
+    aktuell = {eintrag["datei"] for eintrag in manifest.values()}
+    for datei in os.listdir(ziel):
+        if datei not in aktuell and re.fullmatch(r"[a-z0-9-]+\.[0-9a-f]{10}\.(webp|svg)", datei):
+            os.remove(os.path.join(ziel, datei))
+
+    with open(os.path.join(ziel, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def static_url():
+    # Mit dem Präfix aus server.baseUrlPath, z. B. hinter einem Reverse-Proxy unter /arbeitsmodell
+    import streamlit as st
+
+    basis = (st.get_option("server.baseUrlPath") or "").strip("/")
+    return f"/{basis}/{STATIC_PFAD}" if basis else f"/{STATIC_PFAD}"
+
+
+def asset(manifest, quelle, statisch=True, ziel=STATIC_DIR):
+    # URL über die Static-Auslieferung, sonst der lokale Pfad der optimierten Datei
+    eintrag = manifest.get(quelle)
+    if eintrag is None:
+        return quelle
+    if statisch:
+        return static_url() + eintrag["datei"]
+    return os.path.join(ziel, eintrag["datei"])
+
+
+def seitengewicht(manifest, quellen):
+    original = sum(manifest[q]["original"] for q in quellen)
+    optimiert = sum(manifest[q]["optimiert"] for q in quellen)
+    return original, optimiert
+
+
+def main():
+    manifest = erzeuge_assets()
+    for quelle, eintrag in manifest.items():
+        print(f"{quelle:<20}{eintrag['original']:>12}{eintrag['optimiert']:>12}  {eintrag['datei']}")
+
+    # Header (alle Seiten) und Auswertung (Header + vier Clusterbilder)
+    kopf = ["kit-logo-en.svg", "HAW-Logo.png"]
+    auswertung = kopf + [q for q in QUELLEN if q.startswith("Cluster")]
+    for seite, quellen in (("Header", kopf), ("Auswertung", auswertung)):
+        original, optimiert = seitengewicht(manifest, quellen)
+        print(f"Seitengewicht {seite}: {original / 1024:.0f} KB -> {optimiert / 1024:.0f} KB", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,307 @@
+# Benchmark-Suite für Clusterzuordnung, Radar-Diagramme, HTML-Bericht und Speichern
+#
+# Läuft ohne Streamlit-Server und ohne Netzwerk (Speichern gegen storage.FakeWorksheet)
+# mit synthetischen Antwortvektoren. Die Ergebnisse gehen als JSON in eine Datei, damit
+# Läufe (z. B. vor dem Ausrollen einer neuen Fragebogenversion) verglichen werden können.
+#
+# Beispiele:
+#   python bench.py --befragte 2000 --ausgabe bench/basis.json
+#   python bench.py --befragte 2000 --ausgabe bench/neu.json --vergleich bench/basis.json
+#   python bench.py --nur zuordnung_einzel zuordnung_batch
+#
+# Mit --vergleich endet das Skript mit Exit-Code 1, wenn ein Median um mehr als
+# --toleranz (Standard 25 %) langsamer ist als im Vergleichslauf.
+
+import argparse
+import hashlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+
+import antworten
+import radar
+import report
+import stabilitaet
+import storage
+import zielpfad
+from modell import MODELL_DIR, lade_modell
+from scoring import ClusterEngine
+
+
+def synthetische_antworten(modell, anzahl, rng, luecken=0.1):
+    # (anzahl, Slots) int8 mit Scores 1..4; ein Anteil `luecken` bleibt unbeantwortet (0)
+    vektoren = rng.integers(1, 5, size=(anzahl, len(antworten.neu(modell))), dtype=np.int8)
+    vektoren[rng.random(vektoren.shape) < luecken] = antworten.UNBEANTWORTET
+    return vektoren
+
+
+def zeiten(funktion, wiederholungen):
+    # funktion(i) wird wiederholungen-mal aufgerufen; Dauer je Aufruf in Sekunden
+    ergebnis = []
+    for i in range(wiederholungen):
+        start = time.perf_counter()
+        funktion(i)
+        ergebnis.append(time.perf_counter() - start)
+    return ergebnis
+
+
+def kennzahlen(dauern, **extra):
+    ms = np.asarray(dauern) * 1000
+    return {
+        "n": len(ms),
+        "median_ms": round(float(np.median(ms)), 4),
+        "p95_ms": round(float(np.percentile(ms, 95)), 4),
+        "min_ms": round(float(ms.min()), 4),
+        **extra,
+    }
+
+
+def mtok_radar_daten(modell, vektor):
+    mittel = antworten.feldmittel(vektor, modell)
+    labels, werte = [], []
+    for dimension, felder in modell.dimensionen.items():
+        for feld in felder:
+            labels.append(f"{feld} ({dimension})".replace(" und ", "\nund ").replace("(", "\n("))
+            werte.append(mittel.get(feld, 1))
+    return labels, werte
+
+
+class Suite:
+    def __init__(self, befragte, wiederholungen, seed, latenz):
+        self.modell = lade_modell()
+        self.engine = ClusterEngine(self.modell.codes)
+        self.schema = storage.baue_schema(self.modell.codes, list(self.modell.felder), len(self.modell.cluster))
+        self.rng = np.random.default_rng(seed)
+        self.vektoren = synthetische_antworten(self.modell, befragte, self.rng)
+        self.wiederholungen = wiederholungen
+        self.latenz = latenz
+
+    def _vektor(self, i):
+        return self.vektoren[i % len(self.vektoren)]
+
+    def _zuordnen(self, vektoren):
+        item_scores, beantwortet = antworten.item_scores(vektoren, self.modell)
+        return self.engine.zuordnen(item_scores, antworten.direkt_werte(vektoren, self.modell), beantwortet)
+
+    def _cluster_werte(self, vektor):
+        zuordnung = self._zuordnen(vektor[None, :])
+        return {v: float(w) for v, w in zip(self.engine.variablen, zuordnung.werte[0]) if not np.isnan(w)}
+
+    def zuordnung_einzel(self):
+        # Wie berechne_clusterzuordnung: ein Befragter je Aufruf
+        return kennzahlen(zeiten(lambda i: self._zuordnen(self._vektor(i)[None, :]), self.wiederholungen))
+
+    def zuordnung_batch(self):
+        # Alle Befragten in einem Aufruf (rescore.py, Auswertungen)
+        dauern = zeiten(lambda i: self._zuordnen(self.vektoren), max(3, self.wiederholungen // 10))
+        return kennzahlen(dauern, befragte=len(self.vektoren),
+                          us_je_befragtem=round(float(np.median(dauern)) / len(self.vektoren) * 1e6, 3))
+
+    def radar_mtok_png(self):
+        return kennzahlen(zeiten(
+            lambda i: radar._render_matplotlib(*mtok_radar_daten(self.modell, self._vektor(i)), format="png"),
+            max(3, self.wiederholungen // 10),
+        ))
+
+    def radar_cluster_png(self):
+        return kennzahlen(zeiten(
+            lambda i: radar._render_matplotlib(*radar.cluster_radar_daten(self._cluster_werte(self._vektor(i))),
+                                               format="png"),
+            max(3, self.wiederholungen // 10),
+        ))
+
+    def radar_svg(self):
+        return kennzahlen(zeiten(
+            lambda i: radar.radar_svg(*mtok_radar_daten(self.modell, self._vektor(i))),
+            self.wiederholungen,
+        ))
+
+    def _bericht(self, format):
+        vektor = self._vektor(0)
+        if format == "svg":
+            bild_mtok = radar.radar_svg(*mtok_radar_daten(self.modell, vektor)).encode("utf-8")
+            bild_cluster = radar.radar_svg(*radar.cluster_radar_daten(self._cluster_werte(vektor))).encode("utf-8")
+        else:
+            bild_mtok = radar._render_matplotlib(*mtok_radar_daten(self.modell, vektor), format="png")
+            bild_cluster = radar._render_matplotlib(*radar.cluster_radar_daten(self._cluster_werte(vektor)),
+                                                    format="png")
+        cluster = next(iter(self.modell.cluster.values()))
+
+        def bauen(i):
+            # Ohne Raster-Cache, also wie der erste Download eines Berichts
+            report._rastern.cache_clear()
+            bericht, _ = report.baue_bericht(
+                cluster.name, cluster.beschreibung, cluster.empfehlungen, self.modell.dimensionen,
+                antworten.feldmittel(self._vektor(i), self.modell), self._cluster_werte(self._vektor(i)),
+                bild_mtok, bild_cluster, format,
+            )
+            bauen.groesse = len(bericht)
+
+        dauern = zeiten(bauen, max(3, self.wiederholungen // 10))
+        return kennzahlen(dauern, bytes=bauen.groesse)
+
+    def bericht_png(self):
+        return self._bericht("png")
+
+    def bericht_svg(self):
+        return self._bericht("svg")
+
+    def stabilitaet(self):
+        # Stabilitätsanalyse der Auswertung (Monte Carlo und Einzeländerungen) für einen Befragten
+        def analysieren(i):
+            stabilitaet.simulieren(self.engine, self.modell, self._vektor(i))
+            stabilitaet.einzeln_aendern(self.engine, self.modell, self._vektor(i))
+        return kennzahlen(zeiten(analysieren, max(3, self.wiederholungen // 10)), varianten=stabilitaet.ANZAHL)
+
+    def zielpfad(self):
+        # Weg zum jeweils nächstgelegenen anderen Cluster (greedy, Branch-and-Bound bis zum Zeitbudget)
+        def suchen(i):
+            abweichungen = self._zuordnen(self._vektor(i)[None, :]).abweichungen[0]
+            ziel = self.engine.cluster_namen[int(np.argsort(abweichungen)[1])]
+            zielpfad.suchen(self.engine, self.modell, self._vektor(i), ziel)
+        return kennzahlen(zeiten(suchen, max(3, self.wiederholungen // 10)), budget_ms=zielpfad.BUDGET * 1000)
+
+    def speicherzeile(self):
+        # Zeile wie in speichere_daten("Final") aufbauen und auf das Schema normalisieren
+        def bauen(i):
+            vektor = self._vektor(i)
+            zuordnung = self._zuordnen(vektor[None, :])
+            abweichungen = dict(zip(self.engine.cluster_namen, zuordnung.abweichungen[0].tolist()))
+            daten = antworten.speicherzeile(
+                vektor, self.modell, "Final", session_id=f"bench-{i}", zeitstempel=datetime.now().isoformat(),
+                cluster_result=min(abweichungen, key=abweichungen.get), abweichungen_detail=abweichungen,
+            )
+            self.schema.normalisieren(daten)
+        return kennzahlen(zeiten(bauen, self.wiederholungen))
+
+    def speichern_fake(self):
+        # Durchsatz des BatchWriter gegen das FakeWorksheet (ohne Spool)
+        zeilen = [
+            self.schema.normalisieren(antworten.speicherzeile(
+                vektor, self.modell, "Zwischenstand", session_id=f"bench-{i}", zeitstempel=str(i),
+            ))
+            for i, vektor in enumerate(self.vektoren)
+        ]
+        worksheet = storage.FakeWorksheet(latenz=self.latenz)
+        writer = storage.BatchWriter(worksheet, max_wartezeit=0.05)
+        start = time.perf_counter()
+        for i, zeile in enumerate(zeilen):
+            writer.submit((f"bench-{i}", str(i)), zeile)
+        writer.close()
+        dauer = time.perf_counter() - start
+        return {
+            "zeilen": len(worksheet.zeilen),
+            "aufrufe": worksheet.aufrufe,
+            "dauer_s": round(dauer, 4),
+            "zeilen_je_s": round(len(worksheet.zeilen) / dauer, 1),
+        }
+
+
+BENCHMARKS = [
+    "zuordnung_einzel",
+    "zuordnung_batch",
+    "radar_mtok_png",
+    "radar_cluster_png",
+    "radar_svg",
+    "bericht_png",
+    "bericht_svg",
+    "stabilitaet",
+    "zielpfad",
+    "speicherzeile",
+    "speichern_fake",
+]
+
+
+def umgebung():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+
+    modell_hash = hashlib.sha256()
+    for name in sorted(os.listdir(MODELL_DIR)):
+        with open(os.path.join(MODELL_DIR, name), "rb") as f:
+            modell_hash.update(f.read())
+
+    return {
+        "zeitpunkt": datetime.now().isoformat(timespec="seconds"),
+        "commit": commit,
+        "modell": modell_hash.hexdigest()[:12],
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "plattform": platform.platform(),
+    }
+
+
+def vergleichen(ergebnisse, basis, toleranz):
+    # Liefert die Benchmarks, deren Median um mehr als toleranz langsamer ist
+    regressionen = []
+    for name, werte in ergebnisse.items():
+        alt = basis.get("ergebnisse", {}).get(name, {}).get("median_ms")
+        neu = werte.get("median_ms")
+        if alt and neu:
+            faktor = neu / alt
+            markierung = "  REGRESSION" if faktor > 1 + toleranz else ""
+            print(f"{name:<22}{alt:>12.3f}{neu:>12.3f}{faktor:>9.2f}x{markierung}")
+            if markierung:
+                regressionen.append(name)
+    return regressionen
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks für Zuordnung, Radar, Bericht und Speichern.")
+    parser.add_argument("--befragte", type=int, default=1000, help="Anzahl synthetischer Befragter (Standard: 1000)")
+    parser.add_argument("--wiederholungen", type=int, default=100,
+                        help="Messungen je schnellem Benchmark, Plots/Berichte ein Zehntel (Standard: 100)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--latenz", type=float, default=0.0,
+                        help="Simulierte Latenz je append_rows in Sekunden (Standard: 0)")
+    parser.add_argument("--nur", nargs="+", choices=BENCHMARKS, help="Nur diese Benchmarks ausführen")
+    parser.add_argument("--ausgabe", help="Ergebnisse als JSON in diese Datei schreiben")
+    parser.add_argument("--vergleich", help="JSON eines früheren Laufs zum Vergleich")
+    parser.add_argument("--toleranz", type=float, default=0.25,
+                        help="Erlaubte Verlangsamung des Medians beim Vergleich (Standard: 0.25)")
+    args = parser.parse_args(argv)
+
+    suite = Suite(args.befragte, args.wiederholungen, args.seed, args.latenz)
+    ergebnisse = {}
+    for name in args.nur or BENCHMARKS:
+        ergebnisse[name] = getattr(suite, name)()
+        werte = ergebnisse[name]
+        if "median_ms" in werte:
+            print(f"{name:<22}{werte['median_ms']:>12.3f} ms (p95 {werte['p95_ms']:.3f})", file=sys.stderr)
+        else:
+            print(f"{name:<22}{werte['zeilen_je_s']:>12.1f} Zeilen/s", file=sys.stderr)
+
+    lauf = {
+        "umgebung": umgebung(),
+        "parameter": {k: v for k, v in vars(args).items() if k not in ("ausgabe", "vergleich")},
+        "ergebnisse": ergebnisse,
+    }
+    if args.ausgabe:
+        if os.path.dirname(args.ausgabe):
+            os.makedirs(os.path.dirname(args.ausgabe), exist_ok=True)
+        with open(args.ausgabe, "w", encoding="utf-8") as f:
+            json.dump(lauf, f, indent=2, ensure_ascii=False)
+    else:
+        json.dump(lauf, sys.stdout, indent=2, ensure_ascii=False)
+        print()
+
+    if args.vergleich:
+        with open(args.vergleich, encoding="utf-8") as f:
+            basis = json.load(f)
+        print(f"{'Benchmark':<22}{'alt ms':>12}{'neu ms':>12}{'Faktor':>10}")
+        if vergleichen(ergebnisse, basis, args.toleranz):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
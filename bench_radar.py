@@ -0,0 +1,61 @@
+# Vergleich der Radar-Renderer: Renderzeit und Ausgabegröße
+#
+# Rendert das MTOK-Radar (9 Achsen, mehrzeilige Beschriftung) ohne Cache mit matplotlib
+# (PNG und SVG) und mit dem direkten SVG-Renderer.
+#
+# Beispiel:
+#   python bench_radar.py --wiederholungen 20
+
+import argparse
+import time
+
+import numpy as np
+
+import radar
+
+LABELS = [
+    "Persönliche Voraussetzungen\n(Mensch)",
+    "Qualifikation\nund Kompetenzentwicklung\n(Mensch)",
+    "Automatisierung\nund Arbeitsplatzgestaltung\n(Technik)",
+    "Digitale Vernetzung\nund IT-Infrastruktur\n(Technik)",
+    "Kommunikation, Kooperation\nund Zusammenarbeit\n(Organisation)",
+    "Organisatorische Umwelt\n(Organisation)",
+    "Produktionsorganisation\n(Organisation)",
+    "Unternehmenskultur\n(Kultur)",
+    "Führung\nund Teamzusammenhalt\n(Kultur)",
+]
+
+VARIANTEN = {
+    "matplotlib png dpi=300": lambda l, v: radar._render_matplotlib(l, v, format="png", dpi=300),
+    "matplotlib png dpi=100": lambda l, v: radar._render_matplotlib(l, v, format="png", dpi=100),
+    "matplotlib svg": lambda l, v: radar._render_matplotlib(l, v, format="svg"),
+    "direktes svg": lambda l, v: radar.radar_svg(l, v).encode("utf-8"),
+}
+
+
+def messen(funktion, wiederholungen, rng):
+    zeiten = []
+    groesse = 0
+    for _ in range(wiederholungen):
+        werte = list(rng.uniform(1, 4, len(LABELS)).round(2))
+        start = time.perf_counter()
+        bild = funktion(LABELS, werte)
+        zeiten.append(time.perf_counter() - start)
+        groesse = len(bild)
+    return np.median(zeiten) * 1000, groesse
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Renderzeit und Größe der Radar-Diagramme vergleichen.")
+    parser.add_argument("--wiederholungen", type=int, default=10, help="Renderläufe je Variante (Standard: 10)")
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(0)
+    print(f"{'Variante':<26}{'Median ms':>12}{'Bytes':>12}")
+    for name, funktion in VARIANTEN.items():
+        ms, groesse = messen(funktion, args.wiederholungen, rng)
+        print(f"{name:<26}{ms:>12.1f}{groesse:>12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,299 @@
+# Vergleichswerte aller bisherigen Befragten (Kohorte)
+#
+# Für jede Handlungsfeld-Mittelwert- und Cluster-Variable werden laufend, ohne die
+# gespeicherten Einreichungen erneut zu lesen, gepflegt:
+#   - Anzahl, Mittelwert und Varianz (Welford-Verfahren)
+#   - ein Histogramm über die Skala 1..4 in Schritten von 0.01 als Quantil-Skizze;
+#     Perzentile und Quantile sind damit auf ±0.005 genau
+# jeweils für alle Befragten ("Alle") und je zugeordnetem Cluster.
+#
+# Der Stand liegt als .npz in ARBEITSMODELL_KOHORTE_PFAD (Standard daten/kohorte.npz).
+# Seine Größe hängt nur von der Anzahl der Variablen und Cluster ab, nicht von der Anzahl
+# der Befragten; Laden und Auswerten kosten daher unabhängig vom Datenbestand gleich viel.
+# Jede "Final"-Speicherung nimmt eine Zeile auf (aufnehmen); mehrere Serverprozesse auf
+# demselben Rechner serialisieren das über eine Sperrdatei.
+#
+# Neuaufbau aus einem Export (gleiche Formate wie rescore.py), z. B. nach Profiländerungen:
+#   python kohorte.py daten/submissions.sqlite
+#   python kohorte.py export.csv -o daten/kohorte.npz
+
+import argparse
+import contextlib
+import logging
+import os
+import sys
+import threading
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: nur Sperre innerhalb des Prozesses
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+PFAD = os.environ.get("ARBEITSMODELL_KOHORTE_PFAD", os.path.join("daten", "kohorte.npz"))
+# Vergleichswerte werden erst ab so vielen Befragten je Gruppe angezeigt
+MIN_ANZAHL = int(os.environ.get("ARBEITSMODELL_KOHORTE_MIN", "5"))
+
+ALLE = "Alle"
+SKALA_MIN = 1.0
+SKALA_MAX = 4.0
+AUFLOESUNG = 0.01
+BINS = int(round((SKALA_MAX - SKALA_MIN) / AUFLOESUNG)) + 1
+
+_lock = threading.Lock()
+_cache = {}  # pfad -> (mtime_ns, Kohorte)
+
+
+class Kohorte:
+    # Gruppen × Variablen: anzahl, mittel, m2 (Summe der quadrierten Abweichungen), histogramm (× BINS)
+
+    def __init__(self, variablen, gruppen):
+        self.variablen = tuple(variablen)
+        self.gruppen = tuple(gruppen)
+        self._variable_index = {v: i for i, v in enumerate(self.variablen)}
+        self._gruppen_index = {g: i for i, g in enumerate(self.gruppen)}
+        form = (len(self.gruppen), len(self.variablen))
+        self.anzahl = np.zeros(form, dtype=np.int64)
+        self.mittel = np.zeros(form)
+        self.m2 = np.zeros(form)
+        self.histogramm = np.zeros(form + (BINS,), dtype=np.int64)
+
+    def hinzufuegen(self, werte, cluster=None):
+        # werte: Variable -> Wert; unbekannte Variablen und fehlende Werte (None, NaN) werden übergangen
+        zeilen = [self._gruppen_index[ALLE]]
+        if cluster in self._gruppen_index and cluster != ALLE:
+            zeilen.append(self._gruppen_index[cluster])
+
+        paare = [(self._variable_index[v], float(w)) for v, w in werte.items()
+                 if v in self._variable_index and w is not None and np.isfinite(w)]
+        if not paare:
+            return
+        spalten = np.array([i for i, _ in paare])
+        x = np.array([w for _, w in paare])
+        bins = _bin(x)
+
+        for g in zeilen:
+            n = self.anzahl[g, spalten] + 1
+            delta = x - self.mittel[g, spalten]
+            self.mittel[g, spalten] += delta / n
+            self.m2[g, spalten] += delta * (x - self.mittel[g, spalten])
+            self.anzahl[g, spalten] = n
+            self.histogramm[g, spalten, bins] += 1
+
+    def _indizes(self, gruppe, variable):
+        g = self._gruppen_index.get(gruppe)
+        v = self._variable_index.get(variable)
+        if g is None or v is None:
+            return None
+        return g, v
+
+    def statistik(self, gruppe, variable):
+        # (Anzahl, Mittelwert, Standardabweichung) oder None ohne Daten
+        indizes = self._indizes(gruppe, variable)
+        if indizes is None or self.anzahl[indizes] == 0:
+            return None
+        n = int(self.anzahl[indizes])
+        streuung = float(np.sqrt(self.m2[indizes] / (n - 1))) if n > 1 else 0.0
+        return n, float(self.mittel[indizes]), streuung
+
+    def perzentil(self, gruppe, variable, wert):
+        # Prozentrang von wert (gleich große Werte zählen zur Hälfte), None ohne Daten
+        indizes = self._indizes(gruppe, variable)
+        if indizes is None or self.anzahl[indizes] == 0 or wert is None or not np.isfinite(wert):
+            return None
+        histogramm = self.histogramm[indizes]
+        b = int(_bin(np.array([float(wert)]))[0])
+        darunter = histogramm[:b].sum()
+        return float(100.0 * (darunter + 0.5 * histogramm[b]) / self.anzahl[indizes])
+
+    def quantil(self, gruppe, variable, q):
+        indizes = self._indizes(gruppe, variable)
+        if indizes is None or self.anzahl[indizes] == 0:
+            return None
+        kumuliert = np.cumsum(self.histogramm[indizes])
+        b = int(np.searchsorted(kumuliert, q * kumuliert[-1], side="left"))
+        return SKALA_MIN + min(b, BINS - 1) * AUFLOESUNG
+
+    def vergleich(self, werte, cluster=None, min_anzahl=MIN_ANZAHL):
+        # Zeilen für die Anzeige: je Variable eigener Wert, Median und Prozentrang (alle / im Cluster).
+        # Gruppen mit weniger als min_anzahl Befragten bleiben leer (None).
+        zeilen = []
+        for variable, wert in werte.items():
+            zeile = {"variable": variable, "wert": wert}
+            for schluessel, gruppe in (("alle", ALLE), ("cluster", cluster)):
+                statistik = self.statistik(gruppe, variable) if gruppe is not None else None
+                if statistik is None or statistik[0] < min_anzahl:
+                    zeile[schluessel] = None
+                    continue
+                zeile[schluessel] = {
+                    "anzahl": statistik[0],
+                    "mittel": statistik[1],
+                    "streuung": statistik[2],
+                    "median": self.quantil(gruppe, variable, 0.5),
+                    "perzentil": self.perzentil(gruppe, variable, wert),
+                }
+            zeilen.append(zeile)
+        return zeilen
+
+    def umstellen(self, variablen, gruppen):
+        # Kopie mit anderer Variablen-/Gruppenliste (z. B. nach Modelländerungen); gleichnamige Werte bleiben
+        neu = Kohorte(variablen, gruppen)
+        for g_neu, gruppe in enumerate(neu.gruppen):
+            g = self._gruppen_index.get(gruppe)
+            if g is None:
+                continue
+            for v_neu, variable in enumerate(neu.variablen):
+                v = self._variable_index.get(variable)
+                if v is None:
+                    continue
+                neu.anzahl[g_neu, v_neu] = self.anzahl[g, v]
+                neu.mittel[g_neu, v_neu] = self.mittel[g, v]
+                neu.m2[g_neu, v_neu] = self.m2[g, v]
+                neu.histogramm[g_neu, v_neu] = self.histogramm[g, v]
+        return neu
+
+    def speichern(self, pfad=PFAD):
+        verzeichnis = os.path.dirname(pfad)
+        if verzeichnis:
+            os.makedirs(verzeichnis, exist_ok=True)
+        tmp = pfad + ".tmp"
+        with open(tmp, "wb") as f:
+            np.savez_compressed(
+                f,
+                variablen=np.array(self.variablen, dtype=str),
+                gruppen=np.array(self.gruppen, dtype=str),
+                anzahl=self.anzahl,
+                mittel=self.mittel,
+                m2=self.m2,
+                histogramm=self.histogramm,
+            )
+        os.replace(tmp, pfad)
+
+    @classmethod
+    def laden(cls, pfad=PFAD):
+        with np.load(pfad) as daten:
+            kohorte = cls(daten["variablen"].tolist(), daten["gruppen"].tolist())
+            kohorte.anzahl[...] = daten["anzahl"]
+            kohorte.mittel[...] = daten["mittel"]
+            kohorte.m2[...] = daten["m2"]
+            kohorte.histogramm[...] = daten["histogramm"]
+        return kohorte
+
+
+def _bin(x):
+    return np.clip(np.rint((x - SKALA_MIN) / AUFLOESUNG), 0, BINS - 1).astype(np.intp)
+
+
+def variablen_des_modells(modell, engine):
+    # Handlungsfelder in Modellreihenfolge, dahinter die Cluster-Variablen der Engine
+    return tuple(modell.felder) + tuple(engine.variablen)
+
+
+def gruppen_des_modells(modell):
+    return (ALLE,) + tuple(modell.cluster)
+
+
+@contextlib.contextmanager
+def _sperre(pfad):
+    with _lock:
+        if fcntl is None:
+            yield
+            return
+        verzeichnis = os.path.dirname(pfad)
+        if verzeichnis:
+            os.makedirs(verzeichnis, exist_ok=True)
+        with open(pfad + ".lock", "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def lesen(variablen, gruppen, pfad=PFAD):
+    # Aktueller Stand für die Anzeige; neu geladen nur, wenn sich die Datei geändert hat
+    try:
+        mtime = os.stat(pfad).st_mtime_ns
+    except FileNotFoundError:
+        return Kohorte(variablen, gruppen)
+
+    eintrag = _cache.get(pfad)
+    if eintrag is None or eintrag[0] != mtime:
+        eintrag = _cache[pfad] = (mtime, Kohorte.laden(pfad))
+    kohorte = eintrag[1]
+    if kohorte.variablen != tuple(variablen) or kohorte.gruppen != tuple(gruppen):
+        kohorte = kohorte.umstellen(variablen, gruppen)
+    return kohorte
+
+
+def aufnehmen(werte, cluster, variablen, gruppen, pfad=PFAD):
+    # Eine finale Einreichung in den gespeicherten Stand übernehmen (lesen, ergänzen, atomar ersetzen).
+    # Fehler werden nur protokolliert, die Einreichung selbst ist zu diesem Zeitpunkt schon gespeichert.
+    try:
+        with _sperre(pfad):
+            if os.path.exists(pfad):
+                kohorte = Kohorte.laden(pfad)
+                if kohorte.variablen != tuple(variablen) or kohorte.gruppen != tuple(gruppen):
+                    kohorte = kohorte.umstellen(variablen, gruppen)
+            else:
+                kohorte = Kohorte(variablen, gruppen)
+            kohorte.hinzufuegen(werte, cluster)
+            kohorte.speichern(pfad)
+    except Exception:
+        logger.exception("Kohorte konnte nicht aktualisiert werden (%s)", pfad)
+        return False
+    return True
+
+
+def aufbauen(eingabe, chunk_groesse=5000):
+    # Stand aus einem Export neu berechnen: je Session die letzte "Final"-Zeile, Cluster mit
+    # den aktuellen Profilen
+    from modell import lade_modell
+    from rescore import _als_zahl, bewerte_block, lese_export
+    from scoring import ClusterEngine
+    from storage import item_code
+
+    modell = lade_modell()
+    engine = None
+    letzte = {}  # Session_ID -> (Werte, Cluster)
+
+    for kopf, zeilen in lese_export(eingabe, chunk_groesse):
+        if engine is None:
+            item_spalten = [s for s in kopf if s.startswith("ITEM::")]
+            engine = ClusterEngine([item_code(s) for s in item_spalten])
+        zeilen = [z for z in zeilen if z.get("Status") == "Final"]
+        if not zeilen:
+            continue
+
+        ergebnis = bewerte_block(engine, item_spalten, zeilen)
+        for i, zeile in enumerate(zeilen):
+            werte = {feld: _als_zahl(zeile.get(feld)) for feld in modell.felder}
+            werte.update(zip(engine.variablen, ergebnis.werte[i].tolist()))
+            index = ergebnis.cluster_index[i]
+            letzte[zeile.get("Session_ID")] = (werte, engine.cluster_namen[index] if index >= 0 else None)
+
+    kohorte = Kohorte(tuple(modell.felder) + (engine.variablen if engine else ()), gruppen_des_modells(modell))
+    for werte, cluster in letzte.values():
+        kohorte.hinzufuegen(werte, cluster)
+    return kohorte
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Vergleichswerte der Kohorte aus gespeicherten Einreichungen neu aufbauen.")
+    parser.add_argument("eingabe", help="CSV-Export des Tabellenblatts, SQLite-Datei oder Parquet-Verzeichnis")
+    parser.add_argument("-o", "--ausgabe", default=PFAD, help=f"Ziel-Datei (Standard: {PFAD})")
+    parser.add_argument("--chunk-groesse", type=int, default=5000, help="Zeilen pro Block (Standard: 5000)")
+    args = parser.parse_args(argv)
+
+    kohorte = aufbauen(args.eingabe, args.chunk_groesse)
+    with _sperre(args.ausgabe):
+        kohorte.speichern(args.ausgabe)
+    anzahl = dict(zip(kohorte.gruppen, kohorte.anzahl.max(axis=1).tolist()))
+    print(f"{args.ausgabe}: " + ", ".join(f"{g} {n}" for g, n in anzahl.items()), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,305 @@
+# Lasttest: viele gleichzeitige Sessions durch das echte app.py
+#
+# Jede simulierte Session läuft mit Streamlits AppTest (ohne Browser und Websocket)
+# von "Start" bis "Auswertung": sie beantwortet jedes Kriterium (ein Rerun je Klick),
+# die abschließenden Fragen, öffnet die Auswertung und speichert ihr Ergebnis.
+# Gespeichert wird über storage.BatchWriter in ein storage.FakeWorksheet mit
+# einstellbarer Latenz und Quota-Fehlern (jeder n-te Aufruf).
+#
+# app.py ruft speichere_daten derzeit nirgends auf; der Lasttest baut die Zeile deshalb
+# selbst mit antworten.speicherzeile aus dem Session-State, wie es speichere_daten tut.
+#
+# Ausgabe: p50/p95/p99 der Rerun-Dauer je Tab, Speicher je Session und Durchsatz der
+# Speicherung, optional als JSON.
+#
+# Der Speicher je Session wird nach dem Lasttest in einem eigenen, sequentiellen Lauf mit
+# tracemalloc gemessen (was nach gc.collect() von den Sessions belegt bleibt). Der RSS
+# eignet sich dafür nicht: freigegebener Speicher geht nicht zwingend an das System zurück
+# und der Writer-Thread teilt ihn sich mit den Sessions.
+#
+# Beispiel:
+#   python lasttest.py --sessions 50 --parallel 10 --latenz 0.3 --fehler-alle 7
+#
+# Hinweis: AppTest führt bei Fragmenten immer das ganze Skript aus; die Zeiten auf den
+# Fragebogen-Tabs sind daher eine obere Schranke für den Klick-Modus.
+
+import argparse
+import gc
+import json
+import logging
+import os
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+APP = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+
+# Ohne Netzwerk; muss vor dem Import von storage gesetzt sein
+os.environ.setdefault("ARBEITSMODELL_STORAGE", "fake")
+
+from streamlit.runtime import Runtime
+from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+from streamlit.testing.v1 import AppTest, app_test, local_script_runner
+
+import antworten
+import storage
+from modell import lade_modell
+
+
+def rss_bytes():
+    # Aktueller Resident Set Size; ohne /proc (z. B. macOS) der Höchststand
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        faktor = 1 if sys.platform == "darwin" else 1024
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * faktor
+
+
+def wie_im_server():
+    # AppTest setzt Runtime._instance für jeden Lauf und danach wieder auf None. Laufen
+    # mehrere Sessions parallel, entzieht ein endender Lauf den übrigen die Runtime.
+    # Wie im echten Server gilt deshalb eine Runtime (die zuletzt erzeugte) für alle.
+    letzte = {}
+    original = Runtime.instance.__func__
+
+    def instance(cls):
+        if cls._instance is not None:
+            letzte["runtime"] = cls._instance
+            return cls._instance
+        return letzte.get("runtime") or original(cls)
+
+    def exists(cls):
+        return cls._instance is not None or "runtime" in letzte
+
+    Runtime.instance = classmethod(instance)
+    Runtime.exists = classmethod(exists)
+
+    # AppTest legt außerdem je Lauf einen neuen ScriptCache an und kompiliert app.py jedes
+    # Mal neu. Der Server kompiliert einmal; parallele ast.parse-Aufrufe sind unter
+    # Python 3.11 zudem nicht threadsicher.
+    cache = ScriptCache()
+    app_test.ScriptCache = local_script_runner.ScriptCache = lambda: cache
+
+
+class MessendesWorksheet(storage.FakeWorksheet):
+    # FakeWorksheet, das den Zeitpunkt jeder erfolgreich übertragenen Zeile festhält
+
+    def __init__(self, messwerte, **kwargs):
+        super().__init__(**kwargs)
+        self.messwerte = messwerte
+
+    def append_rows(self, zeilen):
+        super().append_rows(zeilen)
+        for zeile in zeilen:
+            self.messwerte.speichern(self.messwerte.gespeichert, zeile["Session_ID"])
+
+
+class Messwerte:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reruns = {}     # Tab -> Dauern in Sekunden
+        self.abgeschickt = {}  # Session_ID -> Zeitpunkt von writer.submit
+        self.gespeichert = {}  # Session_ID -> Zeitpunkt des erfolgreichen append_rows
+        self.fehler = []
+
+    def rerun(self, tab, dauer):
+        with self._lock:
+            self.reruns.setdefault(tab, []).append(dauer)
+
+    def speichern(self, ablage, session_id):
+        with self._lock:
+            ablage[session_id] = time.perf_counter()
+
+    def fehlgeschlagen(self, session, meldung):
+        with self._lock:
+            self.fehler.append({"session": session, "fehler": meldung})
+
+
+def session_durchlaufen(nummer, messwerte, writer, schema, timeout, rng, komponenten=None):
+    modell = lade_modell()
+    at = AppTest.from_file(APP, default_timeout=timeout)
+    # Jede AppTest-Instanz sucht sonst beim ersten Lauf erneut nach Komponenten (~0,2 s),
+    # was der echte Server nur einmal tut
+    at._bidi_component_manager = komponenten
+
+    def laufen(tab, aktion=None):
+        start = time.perf_counter()
+        (aktion or at).run()
+        messwerte.rerun(tab, time.perf_counter() - start)
+        if at.exception:
+            raise RuntimeError(f"{tab}: {at.exception[0].value}")
+
+    laufen("Start")
+    tabs = list(modell.dimensionen) + ["Abschließende Fragen", "Auswertung"]
+    for tab in tabs:
+        # "Weiter →" löst einen Rerun mit st.rerun() aus; beide Läufe zählen zum neuen Tab
+        laufen(tab, at.button(key="next_top").click())
+        if tab == "Auswertung":
+            break
+        # Jeder Rerun baut den Elementbaum neu auf, daher jedes Radio erneut über den Key holen
+        for key in [radio.key for radio in at.radio]:
+            radio = at.radio(key=key)
+            radio.set_value(radio.options[rng.integers(len(radio.options))])
+            laufen(tab)
+
+    # Speichern wie speichere_daten("Final")
+    zeitstempel = time.strftime("%Y-%m-%dT%H:%M:%S")
+    daten = antworten.speicherzeile(
+        at.session_state["antworten"], modell, "Final",
+        session_id=at.session_state["session_id"],
+        zeitstempel=f"{zeitstempel}.{nummer:06d}",
+        cluster_result=at.session_state["cluster_result"],
+        abweichungen_detail=at.session_state["abweichungen_detail"],
+    )
+    messwerte.speichern(messwerte.abgeschickt, daten["Session_ID"])
+    writer.submit((daten["Session_ID"], daten["Zeitstempel"]), schema.normalisieren(daten))
+    return at
+
+
+def speicher_je_session(anzahl, schema, timeout, seed, komponenten=None):
+    # Nach gc.collect() noch belegte Bytes je Session, die bis dahin referenziert bleibt;
+    # tracemalloc erfasst nur, was nach dem Start angelegt wurde, der Wert ist also nie negativ
+    messwerte = Messwerte()
+    writer = storage.BatchWriter(storage.FakeWorksheet())
+    gc.collect()
+    tracemalloc.start()
+    try:
+        sessions = [session_durchlaufen(nummer, messwerte, writer, schema, timeout,
+                                        np.random.default_rng([seed, nummer]), komponenten)
+                    for nummer in range(anzahl)]
+        writer.close()
+        del writer
+        gc.collect()
+        belegt = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    return belegt / len(sessions)
+
+
+def perzentile(dauern):
+    ms = np.asarray(dauern) * 1000
+    return {
+        "n": len(ms),
+        "p50_ms": round(float(np.percentile(ms, 50)), 2),
+        "p95_ms": round(float(np.percentile(ms, 95)), 2),
+        "p99_ms": round(float(np.percentile(ms, 99)), 2),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gleichzeitige Sessions durch app.py treiben und messen.")
+    parser.add_argument("--sessions", type=int, default=20, help="Anzahl simulierter Sessions (Standard: 20)")
+    parser.add_argument("--parallel", type=int, default=5, help="Gleichzeitig aktive Sessions (Standard: 5)")
+    parser.add_argument("--latenz", type=float, default=0.2,
+                        help="Latenz je append_rows in Sekunden (Standard: 0.2)")
+    parser.add_argument("--fehler-alle", type=int, default=0,
+                        help="Jeder n-te append_rows-Aufruf liefert einen Quota-Fehler (Standard: 0 = nie)")
+    parser.add_argument("--backoff", type=float, default=0.2,
+                        help="Anfangswartezeit nach Quota-Fehlern in Sekunden (Standard: 0.2)")
+    parser.add_argument("--timeout", type=float, default=120, help="Maximale Dauer eines Reruns in Sekunden")
+    parser.add_argument("--speicher-sessions", type=int, default=5,
+                        help="Sessions für die Speichermessung mit tracemalloc (Standard: 5, 0 = keine)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--ausgabe", help="Ergebnisse als JSON in diese Datei schreiben")
+    args = parser.parse_args(argv)
+
+    # Streamlit-Warnungen (leere Labels, fehlender ScriptRunContext) überdecken sonst die Ausgabe
+    logging.disable(logging.WARNING)
+
+    wie_im_server()
+    modell = lade_modell()
+    schema = storage.baue_schema(modell.codes, list(modell.felder), len(modell.cluster))
+
+    # Aufwärmen: Importe, Modell, Caches und matplotlib einmal laden, damit sie nicht
+    # dem Speicher je Session zugerechnet werden
+    aufwaermen = session_durchlaufen(-1, Messwerte(), storage.BatchWriter(storage.FakeWorksheet()), schema,
+                                     args.timeout, np.random.default_rng(args.seed))
+    komponenten = aufwaermen._bidi_component_manager
+
+    messwerte = Messwerte()
+    worksheet = MessendesWorksheet(messwerte, latenz=args.latenz, fehler_alle=args.fehler_alle)
+    writer = storage.BatchWriter(worksheet, backoff=args.backoff, max_wartezeit=0.5)
+    rss_vorher = rss_bytes()
+    start = time.perf_counter()
+
+    def lauf(nummer):
+        try:
+            return session_durchlaufen(nummer, messwerte, writer, schema, args.timeout,
+                                       np.random.default_rng([args.seed, nummer]), komponenten)
+        except Exception as e:
+            messwerte.fehlgeschlagen(nummer, str(e))
+            return None
+
+    with ThreadPoolExecutor(args.parallel) as pool:
+        # AppTest je Session bzw. None bei Fehlern
+        sessions = list(pool.map(lauf, range(args.sessions)))
+    dauer_sessions = time.perf_counter() - start
+    rss_nachher = rss_bytes()
+
+    writer.close()
+    gespeichert = len(worksheet.zeilen)
+    aktiv = sum(1 for s in sessions if s is not None)
+    del sessions
+
+    je_session = None
+    if args.speicher_sessions > 0:
+        try:
+            je_session = speicher_je_session(args.speicher_sessions, schema, args.timeout, args.seed, komponenten)
+        except Exception as e:
+            messwerte.fehlgeschlagen("speicher", str(e))
+
+    # Speicherlatenz je Zeile (submit bis bestätigtes append_rows) und Durchsatz
+    # zwischen erstem submit und letzter Bestätigung
+    latenzen = [messwerte.gespeichert[s] - t for s, t in messwerte.abgeschickt.items() if s in messwerte.gespeichert]
+    if messwerte.gespeichert:
+        fenster = max(messwerte.gespeichert.values()) - min(messwerte.abgeschickt.values())
+    else:
+        fenster = float("nan")
+
+    ergebnis = {
+        "parameter": vars(args),
+        "reruns": {tab: perzentile(dauern) for tab, dauern in messwerte.reruns.items()},
+        "speicher": {
+            "rss_vorher_mb": round(rss_vorher / 2 ** 20, 1),
+            "rss_nachher_mb": round(rss_nachher / 2 ** 20, 1),
+            "kb_je_session": round(je_session / 1024, 1) if je_session is not None else None,
+            "sessions_gemessen": args.speicher_sessions,
+        },
+        "speichern": {
+            "zeilen": gespeichert,
+            "append_rows_aufrufe": worksheet.aufrufe,
+            "latenz": perzentile(latenzen) if latenzen else None,
+            "dauer_s": round(fenster, 2),
+            "zeilen_je_s": round(gespeichert / fenster, 2) if fenster > 0 else None,
+        },
+        "sessions": {"gestartet": args.sessions, "fehlerfrei": aktiv, "dauer_s": round(dauer_sessions, 2)},
+        "fehler": messwerte.fehler,
+    }
+
+    print(f"{'Tab':<24}{'n':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for tab, werte in ergebnis["reruns"].items():
+        print(f"{tab:<24}{werte['n']:>6}{werte['p50_ms']:>10.1f}{werte['p95_ms']:>10.1f}{werte['p99_ms']:>10.1f}")
+    if je_session is not None:
+        print(f"Speicher je Session: {je_session / 1024:.0f} KB (tracemalloc, {args.speicher_sessions} Sessions)")
+    print(f"Gespeichert: {gespeichert}/{aktiv} Zeilen in {worksheet.aufrufe} Aufrufen")
+    if latenzen:
+        latenz = ergebnis["speichern"]["latenz"]
+        print(f"Speicherlatenz p50/p95/p99: {latenz['p50_ms']:.0f}/{latenz['p95_ms']:.0f}/{latenz['p99_ms']:.0f} ms, "
+              f"{ergebnis['speichern']['zeilen_je_s'] or 0:.2f} Zeilen/s")
+    for fehler in messwerte.fehler:
+        print(f"Session {fehler['session']}: {fehler['fehler']}", file=sys.stderr)
+
+    if args.ausgabe:
+        with open(args.ausgabe, "w", encoding="utf-8") as f:
+            json.dump(ergebnis, f, indent=2, ensure_ascii=False)
+    return 1 if messwerte.fehler else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
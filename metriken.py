@@ -0,0 +1,210 @@
+# Laufzeitmetriken der heißen Pfade (Reruns, Clusterzuordnung, Radar, Bericht, Speichern)
+#
+# Prozessweite Latenz-Histogramme und Zähler im Prometheus-Textformat. Ausgabe über
+#   ARBEITSMODELL_METRIKEN_DATEI=<pfad>   Textdatei, alle ARBEITSMODELL_METRIKEN_INTERVALL
+#                                         Sekunden (Standard 15) neu geschrieben, z. B. für
+#                                         den Textfile-Collector des node_exporter
+#   ARBEITSMODELL_METRIKEN_PORT=<port>    lokaler HTTP-Endpunkt http://127.0.0.1:<port>/metrics
+# Ist keins von beiden gesetzt, liefert messen() einen leeren Kontextmanager und
+# zaehlen()/beobachten() kehren sofort zurück.
+
+import atexit
+import functools
+import logging
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+DATEI = os.environ.get("ARBEITSMODELL_METRIKEN_DATEI")
+PORT = os.environ.get("ARBEITSMODELL_METRIKEN_PORT")
+INTERVALL = float(os.environ.get("ARBEITSMODELL_METRIKEN_INTERVALL", "15"))
+AKTIV = bool(DATEI or PORT)
+
+# Obergrenzen der Histogramm-Buckets in Sekunden
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+HILFE = {
+    "arbeitsmodell_rerun_sekunden": "Dauer eines vollständigen Skriptlaufs je Tab bzw. eines Fragment-Reruns (tab=fragment)",
+    "arbeitsmodell_clusterzuordnung_sekunden": "Dauer von berechne_clusterzuordnung",
+    "arbeitsmodell_radar_sekunden": "Rendern der Radar-Diagramme je Phase (plot, savefig, svg)",
+    "arbeitsmodell_bericht_sekunden": "Erstellung des HTML-Berichts",
+    "arbeitsmodell_stabilitaet_sekunden": "Monte-Carlo-Stabilitätsanalyse der Clusterzuordnung",
+    "arbeitsmodell_zielpfad_sekunden": "Suche der kleinsten Antwortänderung bis zu einem Zielcluster",
+    "arbeitsmodell_worksheet_sekunden": "Aufbau des Speicher-Backends bzw. der Sheets-Verbindung",
+    "arbeitsmodell_speichern_sekunden": "Dauer eines append_rows/upsert_rows-Aufrufs je Ergebnis",
+    "arbeitsmodell_speichern_zeilen_total": "Erfolgreich übertragene Zeilen",
+    "arbeitsmodell_speichern_fehler_total": "Fehlgeschlagene append_rows/upsert_rows-Aufrufe je Art",
+    "arbeitsmodell_zwischenstand_total": "Zwischenstände je Ergebnis (unveraendert, ersetzt, geschrieben)",
+}
+
+_lock = threading.Lock()
+_histogramme = {}   # (name, labels) -> [bucket_zaehler..., summe, anzahl]
+_zaehler = {}       # (name, labels) -> wert
+_gestartet = False
+
+
+def _labels(labels):
+    return tuple(sorted(labels.items()))
+
+
+def beobachten(name, dauer, **labels):
+    if not AKTIV:
+        return
+    schluessel = (name, _labels(labels))
+    with _lock:
+        werte = _histogramme.get(schluessel)
+        if werte is None:
+            werte = _histogramme[schluessel] = [0] * (len(BUCKETS) + 2)
+        for i, grenze in enumerate(BUCKETS):
+            if dauer <= grenze:
+                werte[i] += 1
+                break
+        werte[-2] += dauer
+        werte[-1] += 1
+
+
+def zaehlen(name, wert=1, **labels):
+    if not AKTIV:
+        return
+    schluessel = (name, _labels(labels))
+    with _lock:
+        _zaehler[schluessel] = _zaehler.get(schluessel, 0) + wert
+
+
+class _Messung:
+    __slots__ = ("name", "labels", "start")
+
+    def __init__(self, name, labels):
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, typ, *exc):
+        # Abgebrochene Messungen bekommen das Label fehler="1"
+        labels = dict(self.labels, fehler="1") if typ is not None else self.labels
+        beobachten(self.name, time.perf_counter() - self.start, **labels)
+
+
+class _Leer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+_LEER = _Leer()
+
+
+def messen(name, **labels):
+    return _Messung(name, labels) if AKTIV else _LEER
+
+
+def gemessen(name, **labels):
+    # Dekorator-Variante von messen(); ausgeschaltet wird die Funktion unverändert zurückgegeben
+    def dekorator(funktion):
+        if not AKTIV:
+            return funktion
+
+        @functools.wraps(funktion)
+        def wrapper(*args, **kwargs):
+            with _Messung(name, labels):
+                return funktion(*args, **kwargs)
+        return wrapper
+    return dekorator
+
+
+def _escape(wert):
+    return str(wert).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels, extra=()):
+    paare = list(labels) + list(extra)
+    if not paare:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in paare) + "}"
+
+
+def prometheus_text():
+    with _lock:
+        histogramme = {k: list(v) for k, v in _histogramme.items()}
+        zaehler = dict(_zaehler)
+
+    zeilen = []
+    for typ, daten in (("histogram", histogramme), ("counter", zaehler)):
+        for name in sorted({name for name, _ in daten}):
+            if name in HILFE:
+                zeilen.append(f"# HELP {name} {HILFE[name]}")
+            zeilen.append(f"# TYPE {name} {typ}")
+            for (n, labels), werte in sorted(daten.items()):
+                if n != name:
+                    continue
+                if typ == "counter":
+                    zeilen.append(f"{name}{_format_labels(labels)} {werte}")
+                    continue
+                kumuliert = 0
+                for grenze, anzahl in zip(BUCKETS, werte):
+                    kumuliert += anzahl
+                    zeilen.append(f"{name}_bucket{_format_labels(labels, [('le', grenze)])} {kumuliert}")
+                zeilen.append(f"{name}_bucket{_format_labels(labels, [('le', '+Inf')])} {werte[-1]}")
+                zeilen.append(f"{name}_sum{_format_labels(labels)} {werte[-2]:.6f}")
+                zeilen.append(f"{name}_count{_format_labels(labels)} {werte[-1]}")
+    return "\n".join(zeilen) + "\n"
+
+
+def datei_schreiben(pfad=None):
+    pfad = pfad or DATEI
+    tmp = pfad + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(prometheus_text())
+    os.replace(tmp, pfad)
+
+
+def _datei_schleife():
+    while True:
+        time.sleep(INTERVALL)
+        try:
+            datei_schreiben()
+        except OSError:
+            logger.exception("Metrikdatei konnte nicht geschrieben werden")
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?", 1)[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        inhalt = prometheus_text().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(inhalt)))
+        self.end_headers()
+        self.wfile.write(inhalt)
+
+    def log_message(self, *args):
+        pass
+
+
+def starten():
+    # Ausgabe einmal pro Prozess starten (mehrfacher Aufruf ist harmlos)
+    global _gestartet
+    with _lock:
+        if not AKTIV or _gestartet:
+            return
+        _gestartet = True
+
+    if DATEI:
+        threading.Thread(target=_datei_schleife, name="metriken-datei", daemon=True).start()
+        atexit.register(datei_schreiben)
+    if PORT:
+        server = ThreadingHTTPServer(("127.0.0.1", int(PORT)), _Handler)
+        threading.Thread(target=server.serve_forever, name="metriken-http", daemon=True).start()
+        logger.info("Metriken unter http://127.0.0.1:%s/metrics", PORT)
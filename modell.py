@@ -0,0 +1,202 @@
+# Fragebogen- und Clustermodell
+#
+# Die Inhalte stehen deklarativ in modell/*.json:
+#   fragebogen.json  Antwortskala, MTOK-Dimensionen, Einleitungstexte, Kriterien je Handlungsfeld
+#   cluster.json     Clusterprofile, Beschreibungen, Bilder, Handlungsempfehlungen
+#   variablen.json   Zuordnung der Items (über ihren Code, z. B. "M1.1") zu Cluster-Variablen,
+#                    invertierte Variablen
+#
+# lade_modell() kompiliert sie einmal pro Prozess in unveränderliche Objekte, die alle
+# Sessions gemeinsam lesen. Streamlit-Reruns bauen nichts davon neu auf.
+# Inkonsistenzen (doppelte oder unbekannte Item-Codes, Variablen ohne Profilwert, ...)
+# führen beim Laden zu einem ModellFehler statt zu stillschweigend verfälschten Ergebnissen.
+
+import functools
+import json
+import os
+import re
+from types import MappingProxyType
+
+import numpy as np
+
+# Verzeichnis der Modelldateien, z. B. für neu geschätzte Clusterprofile (siehe profile_schaetzen.py)
+MODELL_DIR = os.environ.get(
+    "ARBEITSMODELL_MODELL_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "modell")
+)
+
+# Antwortoptionen bei Items mit "einschraenkung": "1_und_4"
+EINSCHRAENKUNGEN = {"1_und_4": ("Nicht erfüllt", "Vollständig erfüllt")}
+
+# Item-Code: Anfangsbuchstabe der MTOK-Dimension, Handlungsfeld, laufende Nummer
+CODE_MUSTER = re.compile(r"[MTOK]\d+\.\d+")
+
+
+class ModellFehler(ValueError):
+    pass
+
+
+class _Eingefroren:
+    __slots__ = ()
+
+    def __init__(self, **werte):
+        for name, wert in werte.items():
+            object.__setattr__(self, name, wert)
+
+    def __setattr__(self, name, wert):
+        raise AttributeError(f"{type(self).__name__} ist unveränderlich")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} ist unveränderlich")
+
+    def __repr__(self):
+        return f"{type(self).__name__}({getattr(self, self.__slots__[0])!r})"
+
+
+class Item(_Eingefroren):
+    # id: fortlaufend über alle Handlungsfelder (Slot im Antwortvektor), code: stabiler Schlüssel
+    # für Zuordnung und Speicherung, position: Index innerhalb des Handlungsfelds,
+    # radio_key: Session-State-Schlüssel des Radio-Widgets
+    __slots__ = ("id", "code", "frage", "begruendung", "feld", "dimension", "position", "optionen",
+                 "radio_key")
+
+
+class Handlungsfeld(_Eingefroren):
+    # item_ids: Item-IDs des Felds als (schreibgeschütztes) Integer-Array
+    __slots__ = ("name", "dimension", "einleitung", "items", "item_ids")
+
+
+class Empfehlung(_Eingefroren):
+    __slots__ = ("text", "bemerkung")
+
+
+class Cluster(_Eingefroren):
+    # profil: Variable -> Profilwert, empfehlungen: Dimension -> Tupel von Empfehlungen
+    __slots__ = ("name", "nummer", "beschreibung", "bild", "profil", "empfehlungen")
+
+
+class Modell(_Eingefroren):
+    __slots__ = (
+        "antwortskala",     # Antworttext -> Score
+        "score_texte",      # Score -> Antworttext
+        "optionen",         # Standard-Antwortoptionen
+        "dimensionen",      # Dimension -> Namen der Handlungsfelder
+        "felder",           # Name -> Handlungsfeld
+        "items",            # alle Items in Fragebogenreihenfolge (Index = Item-ID)
+        "codes",            # Item-Codes in derselben Reihenfolge
+        "code_index",       # Item-Code -> Item-ID
+        "cluster",          # Name -> Cluster, in Profilreihenfolge
+        "variablen",        # Cluster-Variable -> Item-Codes
+        "invertierte_variablen",
+    )
+
+
+def _lese(verzeichnis, name):
+    with open(os.path.join(verzeichnis, name), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _array(werte):
+    array = np.asarray(werte, dtype=np.intp)
+    array.setflags(write=False)
+    return array
+
+
+def kompiliere(fragebogen, cluster, variablen):
+    antwortskala = MappingProxyType(dict(fragebogen["antwortskala"]))
+    optionen = tuple(antwortskala)
+
+    ohne_feld = set(fragebogen["kriterien"]) - {f for felder in fragebogen["dimensionen"].values() for f in felder}
+    if ohne_feld:
+        raise ModellFehler(f"Kriterien ohne Handlungsfeld in den MTOK-Dimensionen: {sorted(ohne_feld)}")
+
+    items = []
+    felder = {}
+    for dimension, feld_namen in fragebogen["dimensionen"].items():
+        for feld in feld_namen:
+            feld_items = []
+            for position, eintrag in enumerate(fragebogen["kriterien"].get(feld, [])):
+                code = eintrag["code"]
+                if not CODE_MUSTER.fullmatch(code) or not eintrag["frage"].startswith(code + " "):
+                    raise ModellFehler(f"Ungültiger Item-Code {code!r} für Frage {eintrag['frage']!r}")
+                einschraenkung = eintrag.get("einschraenkung")
+                item = Item(
+                    id=len(items),
+                    code=code,
+                    frage=eintrag["frage"],
+                    begruendung=eintrag["begründung"],
+                    feld=feld,
+                    dimension=dimension,
+                    position=position,
+                    optionen=EINSCHRAENKUNGEN[einschraenkung] if einschraenkung else optionen,
+                    radio_key=f"{dimension}_{feld}_{position}",
+                )
+                items.append(item)
+                feld_items.append(item)
+            felder[feld] = Handlungsfeld(
+                name=feld,
+                dimension=dimension,
+                einleitung=fragebogen["einleitungstexte"].get(feld),
+                items=tuple(feld_items),
+                item_ids=_array([item.id for item in feld_items]),
+            )
+
+    code_index = {}
+    for item in items:
+        if item.code in code_index:
+            raise ModellFehler(f"Item-Code {item.code!r} ist mehrfach vergeben")
+        code_index[item.code] = item.id
+
+    for variable, codes in variablen["items"].items():
+        unbekannt = [code for code in codes if code not in code_index]
+        if unbekannt:
+            raise ModellFehler(f"Cluster-Variable {variable!r} verweist auf unbekannte Items: {unbekannt}")
+        if len(set(codes)) != len(codes):
+            raise ModellFehler(f"Cluster-Variable {variable!r} enthält Items mehrfach")
+    unbekannt = [v for v in variablen["invertiert"] if v not in variablen["items"]]
+    if unbekannt:
+        raise ModellFehler(f"Invertierte Variablen ohne Item-Zuordnung: {unbekannt}")
+
+    # Alle Clusterprofile müssen dieselben Variablen abdecken, inklusive aller Item-Variablen
+    alle_variablen = set(variablen["items"]).union(*cluster["profile"].values())
+    for name, profil in cluster["profile"].items():
+        fehlend = alle_variablen - set(profil)
+        if fehlend:
+            raise ModellFehler(f"Clusterprofil {name!r} ohne Werte für {sorted(fehlend)}")
+
+    cluster_objekte = {}
+    for nummer, (name, profil) in enumerate(cluster["profile"].items(), start=1):
+        empfehlungen = cluster["handlungsempfehlungen"].get(name, {})
+        cluster_objekte[name] = Cluster(
+            name=name,
+            nummer=nummer,
+            beschreibung=cluster["beschreibungen"].get(name),
+            bild=cluster["bilder"].get(name),
+            profil=MappingProxyType(dict(profil)),
+            empfehlungen=MappingProxyType({
+                dimension: tuple(Empfehlung(text=e["text"], bemerkung=e["bemerkung"]) for e in eintraege)
+                for dimension, eintraege in empfehlungen.items()
+            }),
+        )
+
+    return Modell(
+        antwortskala=antwortskala,
+        score_texte=MappingProxyType({score: text for text, score in antwortskala.items()}),
+        optionen=optionen,
+        dimensionen=MappingProxyType({d: tuple(f) for d, f in fragebogen["dimensionen"].items()}),
+        felder=MappingProxyType(felder),
+        items=tuple(items),
+        codes=tuple(item.code for item in items),
+        code_index=MappingProxyType(code_index),
+        cluster=MappingProxyType(cluster_objekte),
+        variablen=MappingProxyType({v: tuple(f) for v, f in variablen["items"].items()}),
+        invertierte_variablen=tuple(variablen["invertiert"]),
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def lade_modell(verzeichnis=MODELL_DIR):
+    return kompiliere(
+        _lese(verzeichnis, "fragebogen.json"),
+        _lese(verzeichnis, "cluster.json"),
+        _lese(verzeichnis, "variablen.json"),
+    )
@@ -0,0 +1,277 @@
+# Neuschätzung der Clusterprofile aus gespeicherten Einreichungen
+#
+# Liest einen Export (gleiche Formate wie rescore.py; je Session die letzte "Final"-Zeile),
+# berechnet mit der ClusterEngine die Cluster-Variablen jedes Befragten und passt die
+# Profile mit derselben Metrik an wie die Zuordnung in der App (mittlere absolute
+# Abweichung über die bewerteten Variablen):
+#   medians  k-Medians: Zuordnung zum nächsten Profil, Profil = Median je Variable
+#            (das Zentrum, das die absolute Abweichung minimiert)
+#   medoids  k-Medoids: Profile sind tatsächlich beobachtete Befragte
+# Gestartet wird mit den aktuellen Profilen, die Clusternamen (und damit Beschreibungen,
+# Bilder, Handlungsempfehlungen) bleiben so den passenden Profilen zugeordnet.
+# Mit --mini-batch werden die Profile aus Stichproben fortgeschrieben (Median über
+# Histogramme je Cluster und Variable), danach folgt ein vollständiger Durchlauf.
+#
+# Berichtet werden mittlere Abweichung vorher/nachher, wie viele Befragte ein anderes
+# Cluster erhielten (mit Übergangsmatrix) und die Stabilität über Teilstichproben
+# (mittlerer Jaccard-Index je Cluster).
+#
+# Ausgabe ist ein vollständiges Modellverzeichnis (cluster.json mit den neuen Profilen,
+# fragebogen.json und variablen.json unverändert) plus bericht.json. Die App nutzt es ohne
+# Codeänderung über ARBEITSMODELL_MODELL_DIR, alternativ cluster.json nach modell/ kopieren.
+#
+# Beispiele:
+#   python profile_schaetzen.py daten/submissions.sqlite -o neue_profile
+#   python profile_schaetzen.py export.csv -o neue_profile --verfahren medoids --stabilitaet 50
+#   ARBEITSMODELL_MODELL_DIR=neue_profile streamlit run app.py
+
+import argparse
+import itertools
+import json
+import os
+import shutil
+import sys
+
+import numpy as np
+
+from modell import MODELL_DIR, lade_modell
+from rescore import bewerte_block, lese_export
+from scoring import MIN_CLUSTER_VARS_SCORED, ClusterEngine, mittlere_abweichungen
+from storage import item_code
+
+# Zeilen je Block bei der Zuordnung (begrenzt das Zwischenarray N × Cluster × Variablen)
+BLOCK = 50000
+
+# Raster der Histogramme im Mini-Batch-Verfahren (Skala 1..4)
+SKALA_MIN = 1.0
+AUFLOESUNG = 0.01
+BINS = 301
+
+
+def lade_werte(eingabe, chunk_groesse=5000, nur_final=True):
+    # Cluster-Variablen (N × Variablen, NaN = nicht bewertet) je Session, dazu die Engine mit den aktuellen Profilen
+    engine = None
+    letzte = {}
+    for kopf, zeilen in lese_export(eingabe, chunk_groesse):
+        if engine is None:
+            item_spalten = [s for s in kopf if s.startswith("ITEM::")]
+            engine = ClusterEngine([item_code(s) for s in item_spalten])
+        if nur_final:
+            zeilen = [z for z in zeilen if z.get("Status") == "Final"]
+        if not zeilen:
+            continue
+        werte = bewerte_block(engine, item_spalten, zeilen).werte
+        for zeile, w in zip(zeilen, werte):
+            letzte[zeile.get("Session_ID")] = w
+    if engine is None:
+        raise SystemExit(f"{eingabe}: keine Zeilen gefunden.")
+    werte = np.array(list(letzte.values())).reshape(len(letzte), len(engine.variablen))
+    return engine, werte
+
+
+def zuordnen(werte, profile):
+    # Index des nächsten Profils und Abweichung dazu, blockweise
+    index = np.empty(len(werte), dtype=np.intp)
+    abstand = np.empty(len(werte))
+    for start in range(0, len(werte), BLOCK):
+        abweichungen = mittlere_abweichungen(werte[start:start + BLOCK], profile)
+        index[start:start + BLOCK] = np.argmin(abweichungen, axis=1)
+        abstand[start:start + BLOCK] = np.min(abweichungen, axis=1)
+    return index, abstand
+
+
+def mediane(werte, index, profile):
+    # Median je Cluster und Variable; leere Cluster und Variablen ohne Werte behalten das bisherige Profil
+    neu = profile.copy()
+    for c in range(len(profile)):
+        mitglieder = werte[index == c]
+        if not len(mitglieder):
+            continue
+        with np.errstate(all="ignore"):
+            median = np.nanmedian(mitglieder, axis=0) if np.isfinite(mitglieder).any() else neu[c]
+        neu[c] = np.where(np.isnan(median), neu[c], median)
+    return neu
+
+
+def k_medians(werte, profile, iterationen=100):
+    for iteration in range(1, iterationen + 1):
+        index, _ = zuordnen(werte, profile)
+        neu = mediane(werte, index, profile)
+        if np.allclose(neu, profile, equal_nan=True):
+            return neu, iteration
+        profile = neu
+    return profile, iterationen
+
+
+def _histogramm_median(histogramm):
+    # histogramm: (Cluster, Variablen, BINS) gewichtete Zählungen -> Median je Cluster und Variable
+    kumuliert = np.cumsum(histogramm, axis=-1)
+    gesamt = kumuliert[..., -1:]
+    b = np.argmax(kumuliert >= gesamt / 2, axis=-1)
+    median = SKALA_MIN + b * AUFLOESUNG
+    return np.where(gesamt[..., 0] > 0, median, np.nan)
+
+
+def mini_batch_k_medians(werte, profile, batch_groesse, iterationen, rng, vergessen=0.9):
+    # Profile aus Stichproben fortschreiben: je Cluster und Variable ein Histogramm der
+    # zugeordneten Werte (ältere Stichproben mit Faktor vergessen gewichtet), Profil = dessen Median
+    c_anzahl, v_anzahl = profile.shape
+    histogramm = np.zeros((c_anzahl, v_anzahl, BINS))
+    variable = np.broadcast_to(np.arange(v_anzahl), (batch_groesse, v_anzahl))
+    for _ in range(iterationen):
+        batch = werte[rng.integers(0, len(werte), batch_groesse)]
+        index, _ = zuordnen(batch, profile)
+        gueltig = ~np.isnan(batch)
+        bins = np.clip(np.rint((np.nan_to_num(batch, nan=SKALA_MIN) - SKALA_MIN) / AUFLOESUNG), 0, BINS - 1).astype(np.intp)
+        histogramm *= vergessen
+        np.add.at(
+            histogramm,
+            (np.broadcast_to(index[:, None], bins.shape)[gueltig], variable[gueltig], bins[gueltig]),
+            1.0,
+        )
+        median = _histogramm_median(histogramm)
+        profile = np.where(np.isnan(median), profile, median)
+    return profile
+
+
+def k_medoids(werte, profile, iterationen=20, max_kandidaten=1000, rng=None):
+    # Je Cluster den Befragten mit der kleinsten Summe der Abweichungen zu den übrigen Mitgliedern
+    # (bei großen Clustern auf einer Stichprobe von max_kandidaten)
+    rng = rng or np.random.default_rng(0)
+    for iteration in range(1, iterationen + 1):
+        index, _ = zuordnen(werte, profile)
+        neu = profile.copy()
+        for c in range(len(profile)):
+            mitglieder = werte[index == c]
+            if len(mitglieder) > max_kandidaten:
+                mitglieder = mitglieder[rng.choice(len(mitglieder), max_kandidaten, replace=False)]
+            if not len(mitglieder):
+                continue
+            summen = np.concatenate([
+                _summe_endlich(mittlere_abweichungen(mitglieder[start:start + 100], mitglieder))
+                for start in range(0, len(mitglieder), 100)
+            ])
+            medoid = mitglieder[np.argmin(summen)]
+            neu[c] = np.where(np.isnan(medoid), profile[c], medoid)
+        if np.allclose(neu, profile, equal_nan=True):
+            return neu, iteration
+        profile = neu
+    return profile, iterationen
+
+
+def _summe_endlich(abweichungen):
+    # Paare ohne gemeinsam bewertete Variable (inf) zählen nicht
+    return np.where(np.isinf(abweichungen), 0.0, abweichungen).sum(axis=1)
+
+
+def anpassen(werte, profile, verfahren="medians", mini_batch=None, mini_batch_iterationen=200, rng=None):
+    rng = rng or np.random.default_rng(0)
+    if mini_batch and mini_batch < len(werte):
+        profile = mini_batch_k_medians(werte, profile, mini_batch, mini_batch_iterationen, rng)
+    # Iterationen je Schritt; k-medoids startet von der k-medians-Lösung
+    iterationen = {}
+    profile, iterationen["medians"] = k_medians(werte, profile)
+    if verfahren == "medoids":
+        profile, iterationen["medoids"] = k_medoids(werte, profile, rng=rng)
+    return profile, iterationen
+
+
+def jaccard_stabilitaet(werte, referenz, profile, verfahren, anteil, laeufe, mini_batch, rng):
+    # Mittlerer Jaccard-Index je Cluster zwischen der Zuordnung mit den angepassten Profilen und
+    # Anpassungen auf Teilstichproben (Cluster über die beste Permutation abgeglichen)
+    k = len(profile)
+    jaccard = np.zeros((laeufe, k))
+    for lauf in range(laeufe):
+        auswahl = rng.choice(len(werte), int(anteil * len(werte)), replace=False)
+        teil_profile, _ = anpassen(werte[auswahl], profile, verfahren, mini_batch, rng=rng)
+        index, _ = zuordnen(werte[auswahl], teil_profile)
+        ref = referenz[auswahl]
+        schnitt = np.array([[np.sum((ref == a) & (index == b)) for b in range(k)] for a in range(k)])
+        vereinigung = np.array([[np.sum((ref == a) | (index == b)) for b in range(k)] for a in range(k)])
+        with np.errstate(invalid="ignore", divide="ignore"):
+            j = np.where(vereinigung > 0, schnitt / vereinigung, 0.0)
+        beste = max(itertools.permutations(range(k)), key=lambda p: sum(j[a, p[a]] for a in range(k)))
+        jaccard[lauf] = [j[a, beste[a]] for a in range(k)]
+    return jaccard.mean(axis=0)
+
+
+def schreibe_modell(ausgabe, namen, variablen, profile, nachkommastellen, quelle=MODELL_DIR):
+    os.makedirs(ausgabe, exist_ok=True)
+    for name in ("fragebogen.json", "variablen.json"):
+        shutil.copyfile(os.path.join(quelle, name), os.path.join(ausgabe, name))
+    with open(os.path.join(quelle, "cluster.json"), encoding="utf-8") as f:
+        cluster = json.load(f)
+    cluster["profile"] = {
+        name: {variable: round(float(wert), nachkommastellen) for variable, wert in zip(variablen, zeile)}
+        for name, zeile in zip(namen, profile)
+    }
+    with open(os.path.join(ausgabe, "cluster.json"), "w", encoding="utf-8") as f:
+        json.dump(cluster, f, ensure_ascii=False, indent=2)
+    # Prüft Vollständigkeit und Konsistenz wie beim Start der App
+    lade_modell.cache_clear()
+    lade_modell(ausgabe)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Clusterprofile aus gespeicherten Einreichungen neu schätzen.")
+    parser.add_argument("eingabe", help="CSV-Export des Tabellenblatts, SQLite-Datei oder Parquet-Verzeichnis")
+    parser.add_argument("-o", "--ausgabe", default="neue_profile", help="Ziel-Modellverzeichnis (Standard: neue_profile)")
+    parser.add_argument("--verfahren", choices=("medians", "medoids"), default="medians")
+    parser.add_argument("--mini-batch", type=int, default=None, help="Stichprobengröße je Mini-Batch-Schritt (Standard: aus)")
+    parser.add_argument("--stabilitaet", type=int, default=20, help="Läufe auf Teilstichproben (Standard: 20, 0 = aus)")
+    parser.add_argument("--anteil", type=float, default=0.8, help="Anteil je Teilstichprobe (Standard: 0.8)")
+    parser.add_argument("--nachkommastellen", type=int, default=2, help="Rundung der Profilwerte (Standard: 2)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--alle-zeilen", action="store_true", help="Auch Zwischenstände einbeziehen")
+    parser.add_argument("--chunk-groesse", type=int, default=5000, help="Zeilen pro Leseblock (Standard: 5000)")
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(args.seed)
+    engine, werte = lade_werte(args.eingabe, args.chunk_groesse, nur_final=not args.alle_zeilen)
+    # Wie in der App: nur Befragte mit genügend bewerteten Variablen werden zugeordnet
+    werte = werte[(~np.isnan(werte)).sum(axis=1) >= MIN_CLUSTER_VARS_SCORED]
+    if len(werte) < len(engine.cluster_namen):
+        raise SystemExit(f"Zu wenige zuordenbare Befragte ({len(werte)}).")
+
+    alt_index, alt_abstand = zuordnen(werte, engine.profile)
+    profile, iterationen = anpassen(werte, engine.profile, args.verfahren, args.mini_batch, rng=rng)
+    profile = np.round(profile, args.nachkommastellen)
+    neu_index, neu_abstand = zuordnen(werte, profile)
+
+    k = len(engine.cluster_namen)
+    uebergaenge = np.zeros((k, k), dtype=int)
+    np.add.at(uebergaenge, (alt_index, neu_index), 1)
+    bericht = {
+        "eingabe": args.eingabe,
+        "befragte": len(werte),
+        "verfahren": args.verfahren,
+        "mini_batch": args.mini_batch,
+        **{f"iterationen_{schritt}": anzahl for schritt, anzahl in iterationen.items()},
+        "mittlere_abweichung_vorher": float(alt_abstand.mean()),
+        "mittlere_abweichung_nachher": float(neu_abstand.mean()),
+        "geaenderte_zuordnungen": int((alt_index != neu_index).sum()),
+        "uebergaenge": {
+            alt: {neu: int(uebergaenge[a, b]) for b, neu in enumerate(engine.cluster_namen)}
+            for a, alt in enumerate(engine.cluster_namen)
+        },
+        "groesse_nachher": dict(zip(engine.cluster_namen, np.bincount(neu_index, minlength=k).tolist())),
+    }
+    if args.stabilitaet:
+        jaccard = jaccard_stabilitaet(werte, neu_index, engine.profile, args.verfahren, args.anteil,
+                                      args.stabilitaet, args.mini_batch, rng)
+        bericht["stabilitaet_jaccard"] = dict(zip(engine.cluster_namen, np.round(jaccard, 3).tolist()))
+
+    schreibe_modell(args.ausgabe, engine.cluster_namen, engine.variablen, profile, args.nachkommastellen)
+    with open(os.path.join(args.ausgabe, "bericht.json"), "w", encoding="utf-8") as f:
+        json.dump(bericht, f, ensure_ascii=False, indent=2)
+
+    print(
+        f"{len(werte)} Befragte, mittlere Abweichung {bericht['mittlere_abweichung_vorher']:.3f} -> "
+        f"{bericht['mittlere_abweichung_nachher']:.3f}, {bericht['geaenderte_zuordnungen']} Zuordnungen geändert "
+        f"-> {args.ausgabe}",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()
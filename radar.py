@@ -0,0 +1,199 @@
+import html
+import math
+import os
+from io import BytesIO
+
+import numpy as np
+import streamlit as st
+
+import metriken
+
+# Radar-Backend je Deployment: "matplotlib" (Standard) oder "svg" (direktes SVG ohne matplotlib)
+BACKEND = os.environ.get("ARBEITSMODELL_RADAR_BACKEND", "matplotlib")
+
+# Format, in dem die Diagramme in der Oberfläche angezeigt werden
+ANZEIGE_FORMAT = "svg" if BACKEND == "svg" else "png"
+
+# Radar-Helferfunktionen 
+
+def plot_radar(labels, values, title="", r_max=4):
+    if not labels or not values or len(labels) != len(values):
+        st.warning("Ungültige Daten für Radar-Diagramm.")
+        return None
+
+    angles = np.linspace(0, 2 * np.pi, len(labels), endpoint=False).tolist()
+    angles_cycle = angles + angles[:1]
+    values_cycle = values + values[:1]
+
+    # matplotlib erst beim ersten Diagramm laden (kostet beim Import über eine halbe Sekunde)
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize=(5.5, 5.5), subplot_kw=dict(polar=True))
+    ax.set_theta_offset(np.pi / 2)
+    ax.set_theta_direction(-1)
+
+    ax.plot(angles_cycle, values_cycle, linewidth=2)
+    ax.fill(angles_cycle, values_cycle, alpha=0.25)
+
+    ax.set_xticks(angles)
+    ax.set_xticklabels(labels, fontsize=8)
+
+    ax.set_yticks(list(range(1, r_max + 1)))
+    ax.set_yticklabels([str(i) for i in range(1, r_max + 1)], fontsize=8)
+    ax.set_ylim(0, r_max)
+
+    ax.grid(True, linestyle="dotted")
+    if title:
+        ax.set_title(title, fontsize=12, pad=20)
+
+    return fig
+
+def cluster_radar_daten(cluster_values: dict):
+    labels_ordered = [
+        "Anzahl CNC-Werkzeugmaschinen",
+        "Automatisierungsgrad",
+        "Losgröße",
+        "Durchlaufzeit",
+        "Laufzeit",
+        "Digitalisierungsgrad",
+        "Aufwand Zeit",
+        "Aufwand Mobil",
+        "Prozessinstabilität",
+        "Akzeptanz",
+        "Flexibilitätsbereitschaft",
+    ]
+
+    labels = [lbl for lbl in labels_ordered if lbl in cluster_values]
+    if not labels:
+        st.warning("Keine passenden Cluster-Variablen für das Radar-Diagramm gefunden.")
+        return None
+
+    values = [cluster_values[lbl] for lbl in labels]
+
+    # Label-Umbruch (damit gleiches Styling)
+    wrapped_labels = [lbl.replace(" ", "\n") for lbl in labels]
+
+    return wrapped_labels, values
+
+def plot_cluster_radar(cluster_values: dict, title: str = "Cluster-Variablen-Profil"):
+    daten = cluster_radar_daten(cluster_values)
+    if daten is None:
+        return None
+
+    # Einheitliche Darstellung: Skala 1–5
+    return plot_radar(*daten, title=title, r_max=4)
+
+# Direkter SVG-Renderer mit dem Styling von plot_radar (Start oben, im Uhrzeigersinn,
+# gepunktetes Gitter, Ringe 1..r_max, Füllung mit alpha 0.25)
+SVG_GROESSE = 560
+SVG_RAND = 100  # seitlicher Platz für die Achsenbeschriftung
+SVG_RADIUS = 190
+SVG_FARBE = "#1f77b4"
+
+def radar_svg(labels, values, title="", r_max=4):
+    n = len(labels)
+    cx = SVG_GROESSE / 2 + SVG_RAND
+    cy = SVG_GROESSE / 2
+    oben = 30 if title else 0
+
+    def punkt(i, r):
+        # Winkel wie bei set_theta_offset(pi/2) und set_theta_direction(-1)
+        phi = np.pi / 2 - 2 * np.pi * i / n
+        return cx + r * math.cos(phi), cy + oben - r * math.sin(phi)
+
+    teile = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {SVG_GROESSE + 2 * SVG_RAND} {SVG_GROESSE + oben}" '
+        f'font-family="DejaVu Sans, Arial, sans-serif" font-size="10">'
+    ]
+    if title:
+        teile.append(f'<text x="{cx:.1f}" y="20" text-anchor="middle" font-size="16">{html.escape(title)}</text>')
+
+    # Gitter: Ringe und Speichen gepunktet
+    for k in range(1, r_max + 1):
+        teile.append(
+            f'<circle cx="{cx:.1f}" cy="{cy + oben:.1f}" r="{SVG_RADIUS * k / r_max:.1f}" fill="none" '
+            f'stroke="#b0b0b0" stroke-width="0.8" stroke-dasharray="1,2"/>'
+        )
+    for i in range(n):
+        x, y = punkt(i, SVG_RADIUS)
+        teile.append(
+            f'<line x1="{cx:.1f}" y1="{cy + oben:.1f}" x2="{x:.1f}" y2="{y:.1f}" '
+            f'stroke="#b0b0b0" stroke-width="0.8" stroke-dasharray="1,2"/>'
+        )
+    teile.append(f'<circle cx="{cx:.1f}" cy="{cy + oben:.1f}" r="{SVG_RADIUS}" fill="none" stroke="#000" stroke-width="0.8"/>')
+
+    # Radiale Beschriftung 1..r_max bei 22.5° (Standardposition von matplotlib)
+    phi = np.pi / 2 - np.deg2rad(22.5)
+    for k in range(1, r_max + 1):
+        r = SVG_RADIUS * k / r_max
+        teile.append(
+            f'<text x="{cx + r * math.cos(phi):.1f}" y="{cy + oben - r * math.sin(phi):.1f}" '
+            f'dominant-baseline="middle">{k}</text>'
+        )
+
+    # Werte als gefülltes Polygon
+    werte = [min(max(float(v), 0.0), r_max) for v in values]
+    punkte = " ".join("%.1f,%.1f" % punkt(i, SVG_RADIUS * v / r_max) for i, v in enumerate(werte))
+    teile.append(
+        f'<polygon points="{punkte}" fill="{SVG_FARBE}" fill-opacity="0.25" '
+        f'stroke="{SVG_FARBE}" stroke-width="2" stroke-linejoin="round"/>'
+    )
+
+    # Achsenbeschriftung, mehrzeilig bei "\n"
+    for i, label in enumerate(labels):
+        x, y = punkt(i, SVG_RADIUS + 14)
+        cos_phi = math.cos(np.pi / 2 - 2 * np.pi * i / n)
+        anker = "middle" if abs(cos_phi) < 0.2 else ("start" if cos_phi > 0 else "end")
+        zeilen = str(label).split("\n")
+        teile.append(f'<text x="{x:.1f}" y="{y - (len(zeilen) - 1) * 6:.1f}" text-anchor="{anker}" dominant-baseline="middle">')
+        for j, zeile in enumerate(zeilen):
+            teile.append(f'<tspan x="{x:.1f}" dy="{0 if j == 0 else 12}">{html.escape(zeile)}</tspan>')
+        teile.append("</text>")
+
+    teile.append("</svg>")
+    return "".join(teile)
+
+def _render_svg(labels, values, title="", r_max=4):
+    if not labels or not values or len(labels) != len(values):
+        st.warning("Ungültige Daten für Radar-Diagramm.")
+        return None
+    with metriken.messen("arbeitsmodell_radar_sekunden", phase="svg"):
+        return radar_svg(labels, values, title=title, r_max=r_max).encode("utf-8")
+
+def _render_matplotlib(labels, values, title="", r_max=4, format="png", dpi=300):
+    with metriken.messen("arbeitsmodell_radar_sekunden", phase="plot"):
+        fig = plot_radar(list(labels), list(values), title=title, r_max=r_max)
+    if fig is None:
+        return None
+
+    import matplotlib.pyplot as plt
+
+    buf = BytesIO()
+    try:
+        with metriken.messen("arbeitsmodell_radar_sekunden", phase="savefig", format=format):
+            fig.savefig(buf, format=format, bbox_inches="tight", dpi=dpi)
+    finally:
+        plt.close(fig)
+    return buf.getvalue()
+
+# Gerenderte Radar-Grafiken als Bytes. Der Cache ist prozessweit, nach
+# (labels, values, r_max, ...) geschlüsselt und auf max_entries begrenzt (LRU).
+# Die Figure wird direkt nach dem Rendern geschlossen. SVG wird beim Backend "svg"
+# direkt erzeugt, sonst (und für PNG) über matplotlib.
+@st.cache_data(max_entries=128, show_spinner=False)
+def render_radar(labels, values, title="", r_max=4, format="png", dpi=300, backend=None):
+    if format == "svg" and (backend or BACKEND) == "svg":
+        return _render_svg(list(labels), list(values), title=title, r_max=r_max)
+    return _render_matplotlib(labels, values, title=title, r_max=r_max, format=format, dpi=dpi)
+
+def bild_anzeigen(bild, format):
+    # st.image erkennt SVG nur als String
+    st.image(bild.decode("utf-8") if format == "svg" else bild, width="stretch")
+
+def render_cluster_radar(cluster_values: dict, title: str = "Cluster-Variablen-Profil", format="png", dpi=300):
+    daten = cluster_radar_daten(cluster_values)
+    if daten is None:
+        return None
+
+    labels, values = daten
+    return render_radar(tuple(labels), tuple(values), title=title, r_max=4, format=format, dpi=dpi)
@@ -0,0 +1,232 @@
+# Reliabilitätsanalyse (McDonald's Omega, Cronbachs Alpha) der gespeicherten Itemwerte
+#
+# Liest die ITEM::-Spalten aus einem Export (gleiche Formate wie rescore.py; je Session die
+# letzte "Final"-Zeile) und berechnet je Handlungsfeld und je Cluster-Variable (Items laut
+# variablen.json):
+#   - Cronbachs Alpha aus der Kovarianzmatrix
+#   - McDonald's Omega (total) aus den Ladungen eines Ein-Faktor-Modells (iterierte
+#     Hauptachsenanalyse), erst ab drei Items
+#   - Bootstrap-Konfidenzintervalle (Perzentilmethode)
+# Befragte gehen je Skala nur ein, wenn alle Items der Skala beantwortet sind.
+#
+# Die Kennwerte der Bootstrap-Stichproben werden als Stapel von Kovarianzmatrizen auf
+# einmal berechnet; die Stichproben verteilen sich in festen Blöcken auf einen
+# Prozesspool, das Ergebnis hängt bei gleichem --seed nicht von der Prozesszahl ab.
+# Ergebnisse werden je Datenstand (Hash über Itemmatrix, Skalen und Parameter) in
+# ARBEITSMODELL_RELIABILITAET_CACHE (Standard daten/reliabilitaet) abgelegt; ein erneuter
+# Lauf auf denselben Daten liest nur noch den Cache.
+#
+# Beispiele:
+#   python reliabilitaet.py daten/submissions.sqlite -o reliabilitaet.csv
+#   python reliabilitaet.py export.csv --bootstrap 5000 --prozesse 8
+
+import argparse
+import csv
+import hashlib
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+CACHE_DIR = os.environ.get("ARBEITSMODELL_RELIABILITAET_CACHE", os.path.join("daten", "reliabilitaet"))
+
+# Version des Rechenverfahrens; eine Änderung macht alte Cache-Einträge ungültig
+VERFAHREN = 1
+
+# Bootstrap-Stichproben je Aufgabe im Prozesspool
+BLOCK = 250
+
+SPALTEN = ["Art", "Skala", "Items", "N", "Alpha", "Alpha unten", "Alpha oben", "Omega", "Omega unten", "Omega oben"]
+
+
+def lade_antworten(eingabe, codes, chunk_groesse=5000, nur_final=True):
+    # Itemmatrix (Befragte × codes, NaN = nicht beantwortet), je Session_ID die letzte Zeile
+    from rescore import _als_zahl, lese_export
+    from storage import item_code
+
+    letzte = {}
+    for kopf, zeilen in lese_export(eingabe, chunk_groesse):
+        spalten = {item_code(s): s for s in kopf if s.startswith("ITEM::")}
+        spalten = [spalten.get(code) for code in codes]
+        for zeile in zeilen:
+            if nur_final and zeile.get("Status") != "Final":
+                continue
+            letzte[zeile.get("Session_ID")] = [np.nan if s is None else _als_zahl(zeile.get(s)) for s in spalten]
+
+    return np.array(list(letzte.values()), dtype=float).reshape(len(letzte), len(codes))
+
+
+def skalen(modell):
+    # (Art, Name, Item-Codes) je Handlungsfeld und Cluster-Variable mit mindestens zwei Items
+    ergebnis = [("Handlungsfeld", name, tuple(item.code for item in feld.items)) for name, feld in modell.felder.items()]
+    ergebnis += [("Cluster-Variable", name, tuple(dict.fromkeys(codes))) for name, codes in modell.variablen.items()]
+    return [(art, name, codes) for art, name, codes in ergebnis if len(codes) >= 2]
+
+
+def kovarianzen(x):
+    # x: (..., Befragte, Items) -> (..., Items, Items)
+    x = x - x.mean(axis=-2, keepdims=True)
+    return np.einsum("...ni,...nj->...ij", x, x) / (x.shape[-2] - 1)
+
+
+def alpha(c):
+    k = c.shape[-1]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return k / (k - 1) * (1 - np.trace(c, axis1=-2, axis2=-1) / c.sum(axis=(-2, -1)))
+
+
+def ladungen(c, iterationen=200, toleranz=1e-7):
+    # Ein-Faktor-Ladungen je Kovarianzmatrix (gestapelt) per iterierter Hauptachsenanalyse.
+    # Startwerte: quadrierte multiple Korrelationen auf der Kovarianzskala; Kommunalitäten
+    # werden auf die Itemvarianz begrenzt (Heywood-Fälle).
+    k = c.shape[-1]
+    diagonale = np.arange(k)
+    varianz = np.diagonal(c, axis1=-2, axis2=-1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        kommunalitaet = np.clip(varianz - 1 / np.diagonal(np.linalg.pinv(c), axis1=-2, axis2=-1), 0, varianz)
+    kommunalitaet = np.nan_to_num(kommunalitaet)
+
+    reduziert = c.copy()
+    for _ in range(iterationen):
+        reduziert[..., diagonale, diagonale] = kommunalitaet
+        eigenwerte, eigenvektoren = np.linalg.eigh(reduziert)
+        lam = eigenvektoren[..., -1] * np.sqrt(np.maximum(eigenwerte[..., -1:], 0))
+        neu = np.minimum(lam ** 2, varianz)
+        fertig = np.max(np.abs(neu - kommunalitaet)) < toleranz
+        kommunalitaet = neu
+        if fertig:
+            break
+
+    # Vorzeichen des Eigenvektors ist beliebig: Ladungssumme positiv
+    return lam * np.where(lam.sum(axis=-1, keepdims=True) < 0, -1, 1)
+
+
+def omega(c):
+    if c.shape[-1] < 3:
+        return np.full(c.shape[:-2], np.nan)
+    lam = ladungen(c)
+    varianz = np.diagonal(c, axis1=-2, axis2=-1)
+    fehler = np.maximum(varianz - lam ** 2, 0).sum(axis=-1)
+    gemeinsam = lam.sum(axis=-1) ** 2
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return gemeinsam / (gemeinsam + fehler)
+
+
+def kennwerte(c):
+    # (..., 2): Alpha, Omega
+    return np.stack([alpha(c), omega(c)], axis=-1)
+
+
+def _bootstrap(x, anzahl, seed):
+    # anzahl Bootstrap-Stichproben von x, in Stapeln begrenzter Größe (höchstens ~16 MB je Stapel)
+    rng = np.random.default_rng(seed)
+    n, k = x.shape
+    stapel = max(1, 2_000_000 // (n * k))
+    ergebnisse = []
+    for start in range(0, anzahl, stapel):
+        indizes = rng.integers(0, n, size=(min(stapel, anzahl - start), n))
+        ergebnisse.append(kennwerte(kovarianzen(x[indizes])))
+    return np.concatenate(ergebnisse)
+
+
+def _cache_schluessel(matrix, codes, skalen_liste, bootstrap, seed, konfidenz):
+    schluessel = hashlib.sha256()
+    schluessel.update(json.dumps([VERFAHREN, list(codes), skalen_liste, bootstrap, seed, konfidenz]).encode("utf-8"))
+    schluessel.update(np.ascontiguousarray(matrix, dtype=float).tobytes())
+    return schluessel.hexdigest()[:24]
+
+
+def analysieren(matrix, codes, skalen_liste, bootstrap=1000, seed=0, konfidenz=0.95, prozesse=None,
+                cache_dir=CACHE_DIR):
+    # Liefert (Zeilen, aus_cache); Zeilen als Dicts mit den Schlüsseln aus SPALTEN
+    skalen_liste = [[art, name, list(item_codes)] for art, name, item_codes in skalen_liste]
+    pfad = None
+    if cache_dir:
+        pfad = os.path.join(cache_dir, _cache_schluessel(matrix, codes, skalen_liste, bootstrap, seed, konfidenz) + ".json")
+        if os.path.exists(pfad):
+            with open(pfad, encoding="utf-8") as f:
+                return json.load(f), True
+
+    index = {code: i for i, code in enumerate(codes)}
+    daten = []
+    for art, name, item_codes in skalen_liste:
+        x = matrix[:, [index[code] for code in item_codes]]
+        daten.append(x[~np.isnan(x).any(axis=1)])
+
+    # Bootstrap-Blöcke aller Skalen mit festen, unabhängigen Seeds
+    aufgaben = [(s, min(BLOCK, bootstrap - start)) for s, x in enumerate(daten) if len(x) > 2
+                for start in range(0, bootstrap, BLOCK)]
+    seeds = np.random.SeedSequence(seed).spawn(len(aufgaben))
+    stichproben = {s: [] for s in range(len(daten))}
+    if prozesse == 1:
+        for (s, anzahl), saat in zip(aufgaben, seeds):
+            stichproben[s].append(_bootstrap(daten[s], anzahl, saat))
+    elif aufgaben:
+        with ProcessPoolExecutor(max_workers=prozesse) as pool:
+            futures = [pool.submit(_bootstrap, daten[s], anzahl, saat) for (s, anzahl), saat in zip(aufgaben, seeds)]
+            for (s, _), future in zip(aufgaben, futures):
+                stichproben[s].append(future.result())
+
+    rand = (1 - konfidenz) / 2 * 100
+    zeilen = []
+    for s, ((art, name, item_codes), x) in enumerate(zip(skalen_liste, daten)):
+        zeile = dict.fromkeys(SPALTEN)
+        zeile.update({"Art": art, "Skala": name, "Items": len(item_codes), "N": len(x)})
+        if len(x) > 2:
+            zeile["Alpha"], zeile["Omega"] = (_zahl(w) for w in kennwerte(kovarianzen(x)))
+        if stichproben[s]:
+            verteilung = np.concatenate(stichproben[s])
+            for spalte, werte in (("Alpha", verteilung[:, 0]), ("Omega", verteilung[:, 1])):
+                werte = werte[np.isfinite(werte)]
+                if werte.size:
+                    unten, oben = np.percentile(werte, [rand, 100 - rand])
+                    zeile[f"{spalte} unten"], zeile[f"{spalte} oben"] = float(unten), float(oben)
+        zeilen.append(zeile)
+
+    if pfad:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp = pfad + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(zeilen, f, ensure_ascii=False, indent=1)
+        os.replace(tmp, pfad)
+    return zeilen, False
+
+
+def _zahl(wert):
+    return float(wert) if np.isfinite(wert) else None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="McDonald's Omega und Cronbachs Alpha je Handlungsfeld und Cluster-Variable.")
+    parser.add_argument("eingabe", help="CSV-Export des Tabellenblatts, SQLite-Datei oder Parquet-Verzeichnis")
+    parser.add_argument("-o", "--ausgabe", default="reliabilitaet.csv", help="Ziel-CSV (Standard: reliabilitaet.csv)")
+    parser.add_argument("--bootstrap", type=int, default=1000, help="Bootstrap-Stichproben (Standard: 1000, 0 = keine)")
+    parser.add_argument("--konfidenz", type=float, default=0.95, help="Niveau der Konfidenzintervalle (Standard: 0.95)")
+    parser.add_argument("--seed", type=int, default=0, help="Startwert des Zufallsgenerators (Standard: 0)")
+    parser.add_argument("--prozesse", type=int, default=None, help="Prozesse für den Bootstrap (Standard: alle Kerne)")
+    parser.add_argument("--alle-zeilen", action="store_true", help="Auch Zwischenstände einbeziehen")
+    parser.add_argument("--ohne-cache", action="store_true", help="Cache weder lesen noch schreiben")
+    parser.add_argument("--chunk-groesse", type=int, default=5000, help="Zeilen pro Leseblock (Standard: 5000)")
+    args = parser.parse_args(argv)
+
+    from modell import lade_modell
+
+    modell = lade_modell()
+    matrix = lade_antworten(args.eingabe, modell.codes, args.chunk_groesse, nur_final=not args.alle_zeilen)
+    zeilen, aus_cache = analysieren(
+        matrix, modell.codes, skalen(modell), args.bootstrap, args.seed, args.konfidenz, args.prozesse,
+        cache_dir=None if args.ohne_cache else CACHE_DIR,
+    )
+
+    with open(args.ausgabe, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=SPALTEN)
+        writer.writeheader()
+        writer.writerows(zeilen)
+    print(f"{len(matrix)} Befragte, {len(zeilen)} Skalen{' (aus Cache)' if aus_cache else ''} -> {args.ausgabe}",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+import base64
+import functools
+import logging
+import os
+import string
+import time
+from io import BytesIO
+
+import metriken
+
+logger = logging.getLogger(__name__)
+
+# Einbettung der Radar-Grafiken im HTML-Bericht:
+#   "auto" (Anzeigeformat übernehmen), "svg" (inline), "png" (mit BERICHT_DPI) oder "webp"
+EINBETTUNG = os.environ.get("ARBEITSMODELL_BERICHT_BILDER", "auto")
+BERICHT_DPI = int(os.environ.get("ARBEITSMODELL_BERICHT_DPI", "150"))
+
+# Obergrenze für die Berichtsgröße; Rastergrafiken werden bis dahin verkleinert
+MAX_GROESSE = int(os.environ.get("ARBEITSMODELL_BERICHT_MAX_KB", "1024")) * 1024
+MIN_DPI = 72
+
+# Auflösung, mit der radar.render_radar die PNGs erzeugt
+QUELL_DPI = 300
+
+# Vorlage wird einmal beim Import kompiliert und für jeden Bericht wiederverwendet
+VORLAGE = string.Template("""<!DOCTYPE html>
+<html lang="de">
+<head>
+    <meta charset="utf-8">
+    <title>Standortbestimmung</title>
+    <style>
+        body { font-family: Arial, sans-serif; padding: 40px; max-width: 800px; margin: auto; line-height: 1.6; }
+        h1 { font-size: 26px; color: #003366; }
+        h2 { font-size: 20px; color: #005599; margin-top: 30px; }
+        h3 { font-size: 16px; color: #333333; margin-top: 20px; }
+        .box { background: #f8f9fa; padding: 15px; border-left: 5px solid #005599; border-radius: 5px; margin-bottom: 25px; }
+        img { display: block; margin: 20px auto; }
+        table { width: 100%; border-collapse: collapse; margin-top: 20px; }
+        th, td { border: 1px solid #ccc; padding: 8px; font-size: 13px; }
+        th { background-color: #e1e9f0; text-align: left; }
+        td:nth-child(3) { text-align: center; }
+        ul { margin-top: 0; }
+        li { margin-bottom: 6px; }
+    </style>
+</head>
+<body>
+    <h1>Ergebnisse des Modells</h1>
+    <div class="box"><strong>Clusterzuordnung:</strong><br>$cluster</div>
+    <h2>Clusterbeschreibung</h2>
+    <div class="box">
+        $beschreibung
+    </div>
+    <h2>Clusterspezifische Handlungsempfehlungen</h2>
+    $empfehlungen
+    <h2>Profile</h2>
+    <div class="radar-container">
+        <div>
+            <h3 style="text-align: center;">Handlungsfelder-Profil</h3>
+            $radar_mtok
+        </div>
+        <div>
+            <h3 style="text-align: center;">Cluster-Variablen-Profil</h3>
+            $radar_cluster
+        </div>
+    </div>
+    <h2>Bewertung der Handlungsfelder</h2>
+    <table>
+        <thead><tr><th>Handlungsfeld</th><th>MTOK-Dimension</th><th>Mittelwert</th></tr></thead>
+        <tbody>$handlungsfelder</tbody>
+    </table>
+    <h2>Bewertung der Cluster-Variablen</h2>
+    <table>
+        <thead><tr><th>Cluster-Variable</th><th>Wert</th></tr></thead>
+        <tbody>$cluster_variablen</tbody>
+    </table>
+</body>
+</html>
+""")
+
+
+@functools.lru_cache(maxsize=32)
+def _rastern(png, format, dpi):
+    # Aus dem gecachten 300-dpi-PNG abgeleitet, ohne neu zu plotten
+    from PIL import Image
+
+    bild = Image.open(BytesIO(png))
+    if dpi < QUELL_DPI:
+        faktor = dpi / QUELL_DPI
+        bild = bild.resize((max(1, round(bild.width * faktor)), max(1, round(bild.height * faktor))), Image.LANCZOS)
+
+    buf = BytesIO()
+    if format == "webp":
+        bild.save(buf, format="WEBP", quality=90)
+    else:
+        # Diagramme kommen mit einer Palette aus, das spart den Großteil der Bytes
+        bild.quantize(256, method=Image.Quantize.FASTOCTREE).save(buf, format="PNG", optimize=True)
+    return buf.getvalue()
+
+
+def ziel_format(format, einbettung=EINBETTUNG):
+    # "auto" übernimmt das Anzeigeformat, sonst gilt die Einstellung
+    return format if einbettung == "auto" else einbettung
+
+
+def bild_html(bild, format, alt, einbettung=EINBETTUNG, dpi=BERICHT_DPI, laden=None):
+    # laden(format) liefert dieselbe Grafik (gecacht) in einem anderen Format als die Anzeige
+    if bild is None:
+        return ""
+
+    ziel = ziel_format(format, einbettung)
+    # SVG wird inline eingebettet, PNG und WebP aus dem gecachten PNG gerastert
+    quelle = "svg" if ziel == "svg" else "png"
+    if quelle != format:
+        anders = laden(format=quelle) if laden is not None else None
+        if anders is None:
+            logger.warning("Grafik nicht als %s verfügbar, Bericht nutzt das Anzeigeformat %s", quelle, format)
+            ziel, quelle = format, format
+        else:
+            bild = anders
+
+    if ziel == "svg":
+        return f'<div style="width: 600px; margin: auto;">{bild.decode("utf-8")}</div>'
+
+    daten = base64.b64encode(_rastern(bild, ziel, dpi)).decode("ascii")
+    return f'<img src="data:image/{ziel};base64,{daten}" alt="{alt}" width="600"/>'
+
+
+def empfehlungen_html(cluster_empfehlungen):
+    teile = []
+    for dimension in ["Technik", "Organisation", "Kultur", "Mensch"]:
+        if dimension in cluster_empfehlungen:
+            teile.append(f"<h3>{dimension}</h3><ul>")
+            for eintrag in cluster_empfehlungen[dimension]:
+                teile.append(
+                    f"<li><strong>{eintrag.text}</strong><br>"
+                    f"<span style='font-size: 90%; color: #555;'>{eintrag.bemerkung}</span></li>"
+                )
+            teile.append("</ul>")
+    return "".join(teile)
+
+
+def handlungsfelder_html(mtok_structure, ergebnisse):
+    zeilen = []
+    for dim_name, handlungsfelder_in_dim in mtok_structure.items():
+        for hf_name in handlungsfelder_in_dim:
+            val = ergebnisse.get(hf_name)
+            if val is not None:
+                zeilen.append(f"<tr><td>{hf_name}</td><td>{dim_name}</td><td style='text-align: center;'>{val:.1f}</td></tr>")
+    return "".join(zeilen)
+
+
+def cluster_variablen_html(cluster_values):
+    return "".join(
+        f"<tr><td>{var_name}</td><td style='text-align: center;'>{var_value:.2f}</td></tr>"
+        for var_name, var_value in cluster_values.items()
+    )
+
+
+@metriken.gemessen("arbeitsmodell_bericht_sekunden")
+def baue_bericht(cluster, beschreibung, cluster_empfehlungen, mtok_structure, ergebnisse, cluster_values,
+                 bild_mtok, bild_cluster, format, einbettung=EINBETTUNG, dpi=BERICHT_DPI, max_groesse=MAX_GROESSE,
+                 laden_mtok=None, laden_cluster=None):
+    start = time.perf_counter()
+    felder = dict(
+        cluster=cluster,
+        beschreibung=beschreibung,
+        empfehlungen=empfehlungen_html(cluster_empfehlungen),
+        handlungsfelder=handlungsfelder_html(mtok_structure, ergebnisse),
+        cluster_variablen=cluster_variablen_html(cluster_values),
+    )
+
+    # Rastergrafiken so lange verkleinern, bis der Bericht unter max_groesse liegt
+    while True:
+        felder["radar_mtok"] = bild_html(bild_mtok, format, "Handlungsfelder-Profil", einbettung, dpi, laden_mtok)
+        felder["radar_cluster"] = bild_html(bild_cluster, format, "Cluster-Variablen-Profil", einbettung, dpi,
+                                            laden_cluster)
+        bericht = VORLAGE.substitute(felder).encode("utf-8")
+        if len(bericht) <= max_groesse or ziel_format(format, einbettung) == "svg" or dpi <= MIN_DPI:
+            break
+        dpi = max(MIN_DPI, dpi // 2)
+
+    dauer = time.perf_counter() - start
+    info = {"groesse": len(bericht), "dauer": dauer, "dpi": dpi}
+    logger.info("HTML-Bericht erstellt: %d Bytes in %.1f ms (dpi %d)", len(bericht), dauer * 1000, dpi)
+    if len(bericht) > max_groesse:
+        logger.warning("HTML-Bericht größer als %d Bytes", max_groesse)
+    return bericht, info
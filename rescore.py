@@ -0,0 +1,155 @@
+# Offline-Neubewertung gespeicherter Einreichungen
+#
+# Liest alle gespeicherten Zeilen (Spalten ITEM::… und KAT::… aus speichere_daten) aus einem
+# lokalen Export, ordnet sie blockweise mit der ClusterEngine neu zu und schreibt Zuordnung
+# und Abweichungen als CSV. Der Export wird gestreamt, der Speicherbedarf bleibt konstant.
+#
+# Beispiele:
+#   python rescore.py export.csv -o neu_bewertet.csv
+#   python rescore.py daten/submissions.sqlite -o neu_bewertet.csv --nur-final
+#   python rescore.py daten/submissions/schema_v1 -o neu_bewertet.csv --chunk-groesse 20000
+
+import argparse
+import csv
+import os
+import sqlite3
+import sys
+
+import numpy as np
+
+from scoring import ClusterEngine
+from storage import FEHLWERT, item_code
+
+ID_SPALTEN = ["Session_ID", "Zeitstempel", "Status"]
+
+
+def _als_zahl(wert):
+    if wert is None or wert == "":
+        return np.nan
+    try:
+        zahl = float(str(wert).replace(",", "."))
+    except ValueError:
+        return np.nan
+    return np.nan if zahl == FEHLWERT else zahl
+
+
+def lese_csv(pfad, chunk_groesse):
+    with open(pfad, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        kopf = next(reader, None)
+        if not kopf or "Session_ID" not in kopf:
+            raise SystemExit(f"{pfad}: Kopfzeile mit Spaltennamen (Session_ID, ITEM::…, KAT::…) erwartet.")
+        block = []
+        for zeile in reader:
+            block.append(dict(zip(kopf, zeile)))
+            if len(block) >= chunk_groesse:
+                yield kopf, block
+                block = []
+        if block:
+            yield kopf, block
+
+
+def lese_sqlite(pfad, chunk_groesse, tabelle=None):
+    conn = sqlite3.connect(pfad)
+    try:
+        if tabelle is None:
+            # Neueste Schema-Version in der Datei
+            tabellen = [t for (t,) in conn.execute("SELECT name FROM sqlite_master WHERE name LIKE 'submissions_v%'")]
+            if not tabellen:
+                raise SystemExit(f"{pfad}: keine Tabelle submissions_v<n> gefunden.")
+            tabelle = max(tabellen, key=lambda t: int(t.rsplit("_v", 1)[1]))
+        cursor = conn.execute(f"SELECT * FROM {tabelle}")
+        kopf = [d[0] for d in cursor.description]
+        while True:
+            block = cursor.fetchmany(chunk_groesse)
+            if not block:
+                return
+            yield kopf, [dict(zip(kopf, werte)) for werte in block]
+    finally:
+        conn.close()
+
+
+def lese_parquet(pfad, chunk_groesse):
+    import pyarrow.dataset
+
+    datensatz = pyarrow.dataset.dataset(pfad, format="parquet")
+    kopf = datensatz.schema.names
+    for batch in datensatz.to_batches(batch_size=chunk_groesse):
+        yield kopf, batch.to_pylist()
+
+
+def lese_export(pfad, chunk_groesse):
+    if os.path.isdir(pfad) or pfad.endswith(".parquet"):
+        return lese_parquet(pfad, chunk_groesse)
+    if pfad.endswith((".sqlite", ".db")):
+        return lese_sqlite(pfad, chunk_groesse)
+    return lese_csv(pfad, chunk_groesse)
+
+
+def bewerte_block(engine, item_spalten, zeilen):
+    kat_spalten = [f"KAT::{var}" for var in engine.direkt_variablen]
+
+    items = np.array([[_als_zahl(z.get(s)) for s in item_spalten] for z in zeilen], dtype=float)
+    direkt = np.array([[_als_zahl(z.get(s)) for s in kat_spalten] for z in zeilen], dtype=float)
+    return engine.zuordnen(items, direkt)
+
+
+def rescore(eingabe, ausgabe, chunk_groesse=5000, nur_final=False):
+    bloecke = lese_export(eingabe, chunk_groesse)
+    engine = None
+    anzahl = 0
+
+    with open(ausgabe, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+
+        for kopf, zeilen in bloecke:
+            if engine is None:
+                # Items in der gespeicherten Spaltenreihenfolge; Version 1 speicherte den
+                # Fragetext, der Item-Code steht am Anfang
+                item_spalten = [s for s in kopf if s.startswith("ITEM::")]
+                engine = ClusterEngine([item_code(s) for s in item_spalten])
+                writer.writerow(
+                    ID_SPALTEN
+                    + ["Zugeordnetes Cluster", "Anzahl Variablen"]
+                    + [f"Abweichung {i}" for i in range(1, len(engine.cluster_namen) + 1)]
+                    + [f"VAR::{var}" for var in engine.variablen]
+                )
+
+            if nur_final:
+                zeilen = [z for z in zeilen if z.get("Status") == "Final"]
+                if not zeilen:
+                    continue
+
+            ergebnis = bewerte_block(engine, item_spalten, zeilen)
+            for i, zeile in enumerate(zeilen):
+                index = ergebnis.cluster_index[i]
+                cluster = engine.cluster_namen[index] if index >= 0 else ""
+                writer.writerow(
+                    [zeile.get(s, "") for s in ID_SPALTEN]
+                    + [cluster, int(ergebnis.anzahl_variablen[i])]
+                    + [_formatieren(w) for w in ergebnis.abweichungen[i]]
+                    + [_formatieren(w) for w in ergebnis.werte[i]]
+                )
+            anzahl += len(zeilen)
+
+    return anzahl
+
+
+def _formatieren(wert):
+    return "" if not np.isfinite(wert) else repr(float(wert))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gespeicherte Einreichungen mit den aktuellen Clusterprofilen neu zuordnen.")
+    parser.add_argument("eingabe", help="CSV-Export des Tabellenblatts, SQLite-Datei oder Parquet-Verzeichnis")
+    parser.add_argument("-o", "--ausgabe", default="neu_bewertet.csv", help="Ziel-CSV (Standard: neu_bewertet.csv)")
+    parser.add_argument("--chunk-groesse", type=int, default=5000, help="Zeilen pro Block (Standard: 5000)")
+    parser.add_argument("--nur-final", action="store_true", help="Nur Zeilen mit Status 'Final' bewerten")
+    args = parser.parse_args(argv)
+
+    anzahl = rescore(args.eingabe, args.ausgabe, args.chunk_groesse, args.nur_final)
+    print(f"{anzahl} Zeilen neu bewertet -> {args.ausgabe}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+import numpy as np
+
+from modell import lade_modell
+
+#Mapping der Antworten
+def categorize_cnc_machines(num_machines_raw):
+    if num_machines_raw is None:
+        return np.nan
+    mapping = {
+        "< 5": 1,
+        "5-10": 2,
+        "11-25": 3,
+        "&gt; 25": 4
+    }
+    return mapping.get(num_machines_raw, np.nan)
+
+def categorize_automation_percentage(percentage_str):
+    if percentage_str is None:
+        return np.nan
+    mapping = {
+        "0%": 1,
+        "1-25%": 2,
+        "26-50%": 3,
+        "&gt; 50%": 4
+    }
+    return mapping.get(percentage_str, np.nan)
+
+def categorize_losgroesse(losgroesse_str):
+    if losgroesse_str is None:
+        return np.nan
+    mapping = {
+        "< 5": 1,
+        "5-50": 2,
+        "51-100": 3,
+        "&gt; 100": 4
+    }
+    return mapping.get(losgroesse_str, np.nan)
+
+def categorize_durchlaufzeit(durchlaufzeit_str):
+    if durchlaufzeit_str is None:
+        return np.nan
+    mapping = {
+        "< 1 Tag": 1,
+        "1–3 Tage": 2,
+        "4–7 Tage": 3,
+        "&gt; 7 Tage": 4
+    }
+    return mapping.get(durchlaufzeit_str, np.nan)
+
+def categorize_laufzeit(laufzeit_str):
+    if laufzeit_str is None:
+        return np.nan
+    mapping = {
+        "< 10 min": 1,
+        "11–30 min": 2,
+        "31–90 min": 3,
+        "&gt; 90 min": 4
+    }
+    return mapping.get(laufzeit_str, np.nan)
+
+# Cluster-Variablen, die direkt aus "Abschließende Fragen" kommen:
+# Variable -> (Session-Key der Auswahl, Session-Key des kategorisierten Werts, Kategorisierungsfunktion)
+direct_input_keys = {
+    "Anzahl CNC-Werkzeugmaschinen": ("cnc_range", "anzahl_cnc_werkzeugmaschinen_categorized", categorize_cnc_machines),
+    "Automatisierungsgrad": ("automation_range", "automatisierungsgrad_categorized", categorize_automation_percentage),
+    "Losgröße": ("losgroesse_range", "losgroesse_categorized", categorize_losgroesse),
+    "Durchlaufzeit": ("durchlaufzeit_range", "durchlaufzeit_categorized", categorize_durchlaufzeit),
+    "Laufzeit": ("laufzeit_range", "laufzeit_categorized", categorize_laufzeit)
+}
+
+# Mindestanzahl an bewerteten Variablen
+MIN_CLUSTER_VARS_SCORED = 7
+
+
+def mittlere_abweichungen(werte, profile):
+    # Mittlere absolute Abweichung (N, Profile) über die jeweils in beiden bewerteten Variablen.
+    # Die gültigen Differenzen werden in Variablenreihenfolge nach vorn gezogen und
+    # je Anzahl k gemittelt, damit die Summationsreihenfolge der Einzelberechnung entspricht.
+    werte = np.atleast_2d(werte)
+    maske = ~np.isnan(werte)[:, None, :] & ~np.isnan(profile)[None, :, :]
+    diffs = np.abs(werte[:, None, :] - profile[None, :, :])
+    reihenfolge = np.argsort(~maske, axis=-1, kind="stable")
+    diffs = np.take_along_axis(diffs, reihenfolge, axis=-1)
+    anzahl = maske.sum(axis=-1)
+
+    ergebnis = np.full(anzahl.shape, np.inf)
+    for k in np.unique(anzahl):
+        if k == 0:
+            continue
+        auswahl = anzahl == k
+        ergebnis[auswahl] = np.mean(np.ascontiguousarray(diffs[auswahl][:, :k]), axis=-1)
+    return ergebnis
+
+
+class Zuordnung:
+    # Ergebnis einer Batch-Zuordnung für N Befragte
+    __slots__ = ("cluster_index", "abweichungen", "werte", "anzahl_variablen")
+
+    def __init__(self, cluster_index, abweichungen, werte, anzahl_variablen):
+        self.cluster_index = cluster_index          # (N,), -1 wenn zu wenige Variablen bewertet
+        self.abweichungen = abweichungen            # (N, Cluster), inf wenn keine Abweichung berechenbar
+        self.werte = werte                          # (N, Variablen), NaN = nicht bewertet
+        self.anzahl_variablen = anzahl_variablen    # (N,)
+
+
+class ClusterEngine:
+    # Einmal kompilierte Clusterprofile:
+    # - gewichte: Item-Variable × Item (Anzahl Nennungen des Items in der Variablen)
+    # - profile:  Cluster × Variable
+    # Die Zuordnung ist damit für viele Befragte gleichzeitig eine Folge von Matrixoperationen.
+
+    def __init__(self, item_codes, variable_mapping=None, profile=None, invertierte_variablen=None):
+        # Standard: Item-Zuordnung (variablen.json) und Clusterprofile (cluster.json) aus dem Modell
+        modell = lade_modell()
+        variable_mapping = modell.variablen if variable_mapping is None else variable_mapping
+        if profile is None:
+            profile = {name: cluster.profil for name, cluster in modell.cluster.items()}
+        if invertierte_variablen is None:
+            invertierte_variablen = modell.invertierte_variablen
+
+        self.item_codes = tuple(item_codes)
+        self.item_index = {code: i for i, code in enumerate(self.item_codes)}
+
+        # Reihenfolge wie in der ursprünglichen Berechnung: direkte Angaben, dann Item-Variablen
+        self.direkt_variablen = tuple(direct_input_keys)
+        self.item_variablen = tuple(v for v in variable_mapping if v not in direct_input_keys)
+        self.variablen = self.direkt_variablen + self.item_variablen
+
+        # Zugeordnete Items müssen vorhanden sein, sonst würde die Variable stillschweigend verfälscht
+        self.gewichte = np.zeros((len(self.item_variablen), len(self.item_codes)))
+        for v, var_name in enumerate(self.item_variablen):
+            fehlend = [code for code in variable_mapping[var_name] if code not in self.item_index]
+            if fehlend:
+                raise ValueError(f"Cluster-Variable {var_name!r}: Items {fehlend} fehlen in den Eingabedaten")
+            for code in variable_mapping[var_name]:
+                self.gewichte[v, self.item_index[code]] += 1
+        self.invertiert = np.array([v in invertierte_variablen for v in self.item_variablen])
+
+        self.cluster_namen = tuple(profile)
+        for name in self.cluster_namen:
+            fehlend = [v for v in self.variablen if v not in profile[name]]
+            if fehlend:
+                raise ValueError(f"Clusterprofil {name!r} ohne Werte für {fehlend}")
+        self.profile = np.array(
+            [[profile[c].get(v, np.nan) for v in self.variablen] for c in self.cluster_namen], dtype=float
+        )
+
+    def variablenwerte(self, item_scores, direkt, beantwortet=None):
+        # item_scores: (N, Items), direkt: (N, 5); fehlende Antworten als NaN
+        item_scores = np.atleast_2d(np.asarray(item_scores, dtype=float))
+        direkt = np.atleast_2d(np.asarray(direkt, dtype=float))
+        if beantwortet is None:
+            beantwortet = ~np.isnan(item_scores)
+
+        # Beantwortete, aber ungültige (NaN) Werte machen die Variable ungültig wie bei np.mean
+        gueltig = beantwortet & ~np.isnan(item_scores)
+        ungueltig = (beantwortet & ~gueltig).astype(float) @ self.gewichte.T > 0
+        summen = np.where(gueltig, item_scores, 0.0) @ self.gewichte.T
+        anzahl = beantwortet.astype(float) @ self.gewichte.T
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mittel = summen / anzahl
+        mittel[(anzahl == 0) | ungueltig] = np.nan
+        mittel = np.where(self.invertiert, 5 - mittel, mittel)
+
+        return np.concatenate([direkt, mittel], axis=1)
+
+    def abweichungen(self, werte):
+        return mittlere_abweichungen(werte, self.profile)
+
+    def zuordnen(self, item_scores, direkt, beantwortet=None):
+        werte = self.variablenwerte(item_scores, direkt, beantwortet)
+        abweichungen = self.abweichungen(werte)
+        anzahl_variablen = (~np.isnan(werte)).sum(axis=1)
+
+        cluster_index = np.argmin(abweichungen, axis=1)
+        keine = (anzahl_variablen < MIN_CLUSTER_VARS_SCORED) | np.all(np.isinf(abweichungen), axis=1)
+        cluster_index[keine] = -1
+        return Zuordnung(cluster_index, abweichungen, werte, anzahl_variablen)
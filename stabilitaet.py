@@ -0,0 +1,115 @@
+# Stabilität der Clusterzuordnung eines Befragten
+#
+# Knapp zugeordnete Betriebe wechseln das Cluster schon, wenn eine Antwort eine Stufe
+# anders ausfällt. simulieren() stört dazu den Antwortvektor (Kriterien und kategorisierte
+# direkte Angaben) einige tausend Mal zufällig und ordnet alle Varianten in einem Aufruf
+# der ClusterEngine zu:
+#   - jede beantwortete Frage wird mit Wahrscheinlichkeit p auf eine benachbarte
+#     Antwortstufe verschoben (bei "Nicht erfüllt"/"Vollständig erfüllt"-Fragen auf die andere)
+#   - Ergebnis sind die Anteile je Cluster und je Frage, um wie viel häufiger die Zuordnung
+#     wechselt, wenn gerade diese Antwort gestört ist
+# Dazu kommt einzeln_aendern(): jede Antwort für sich eine Stufe höher bzw. niedriger,
+# mit dem Cluster, das sich daraus ergäbe.
+
+import re
+
+import numpy as np
+
+import antworten
+from scoring import direct_input_keys
+
+ANZAHL = 2000
+WAHRSCHEINLICHKEIT = 0.15
+
+
+class Stabilitaet:
+    __slots__ = ("wahrscheinlichkeiten", "keine", "treiber", "anzahl")
+
+    def __init__(self, wahrscheinlichkeiten, keine, treiber, anzahl):
+        self.wahrscheinlichkeiten = wahrscheinlichkeiten  # Cluster -> Anteil der Varianten
+        self.keine = keine                                # Anteil ohne Zuordnung (zu wenige Variablen)
+        self.treiber = treiber                            # [(Slot, Zuwachs der Wechselquote)], absteigend
+        self.anzahl = anzahl
+
+
+def nachbarstufen(modell):
+    # Je Slot des Antwortvektors und Score (Index 0..4) die nächsthöhere bzw. -niedrigere
+    # zulässige Stufe, 0 wenn es keine gibt
+    slots = len(modell.items) + len(direct_input_keys)
+    oben = np.zeros((slots, 5), dtype=np.int8)
+    unten = np.zeros((slots, 5), dtype=np.int8)
+    stufen = [sorted(modell.antwortskala[o] for o in item.optionen) for item in modell.items]
+    stufen += [[1, 2, 3, 4]] * len(direct_input_keys)
+    for slot, erlaubt in enumerate(stufen):
+        for score in erlaubt:
+            hoeher = [s for s in erlaubt if s > score]
+            niedriger = [s for s in erlaubt if s < score]
+            oben[slot, score] = hoeher[0] if hoeher else 0
+            unten[slot, score] = niedriger[-1] if niedriger else 0
+    return oben, unten
+
+
+def _zuordnen(engine, modell, vektoren):
+    item_scores, beantwortet = antworten.item_scores(vektoren, modell)
+    return engine.zuordnen(item_scores, antworten.direkt_werte(vektoren, modell), beantwortet).cluster_index
+
+
+def simulieren(engine, modell, vektor, anzahl=ANZAHL, wahrscheinlichkeit=WAHRSCHEINLICHKEIT, seed=0):
+    rng = np.random.default_rng(seed)
+    oben, unten = nachbarstufen(modell)
+    slots = np.arange(len(vektor))
+
+    gestoert = (rng.random((anzahl, len(vektor))) < wahrscheinlichkeit) & (vektor != antworten.UNBEANTWORTET)
+    hoch = rng.random((anzahl, len(vektor))) < 0.5
+    ziel_oben = oben[slots, vektor]
+    ziel_unten = unten[slots, vektor]
+    # Ohne Nachbarn in der gezogenen Richtung in die andere ausweichen
+    ziel = np.where(hoch, np.where(ziel_oben > 0, ziel_oben, ziel_unten), np.where(ziel_unten > 0, ziel_unten, ziel_oben))
+    varianten = np.where(gestoert, ziel, vektor).astype(np.int8)
+
+    basis = _zuordnen(engine, modell, vektor[None, :])[0]
+    index = _zuordnen(engine, modell, varianten)
+
+    anteile = np.bincount(index + 1, minlength=len(engine.cluster_namen) + 1) / anzahl
+    wahrscheinlichkeiten = dict(zip(engine.cluster_namen, anteile[1:].tolist()))
+
+    # Wechselquote mit gestörter Antwort gegenüber ohne, je Slot
+    gewechselt = (index != basis).astype(float)
+    mit = gestoert.sum(axis=0)
+    ohne = anzahl - mit
+    with np.errstate(invalid="ignore", divide="ignore"):
+        zuwachs = (gewechselt @ gestoert) / mit - (gewechselt @ ~gestoert) / ohne
+    treiber = [(int(s), float(zuwachs[s])) for s in np.argsort(-np.nan_to_num(zuwachs, nan=-np.inf))
+               if mit[s] and zuwachs[s] > 0]
+    return Stabilitaet(wahrscheinlichkeiten, float(anteile[0]), treiber, anzahl)
+
+
+def einzeln_aendern(engine, modell, vektor):
+    # [(Slot, neuer Score, Clusterindex)] für alle Einzeländerungen um eine Stufe, die das Cluster wechseln
+    oben, unten = nachbarstufen(modell)
+    kandidaten = []
+    for slot in np.flatnonzero(vektor != antworten.UNBEANTWORTET):
+        for score in sorted({int(oben[slot, vektor[slot]]), int(unten[slot, vektor[slot]])} - {0}):
+            kandidaten.append((int(slot), score))
+    if not kandidaten:
+        return []
+
+    varianten = np.repeat(vektor[None, :], len(kandidaten), axis=0)
+    varianten[np.arange(len(kandidaten)), [s for s, _ in kandidaten]] = [w for _, w in kandidaten]
+    basis = _zuordnen(engine, modell, vektor[None, :])[0]
+    index = _zuordnen(engine, modell, varianten)
+    return [(slot, score, int(c)) for (slot, score), c in zip(kandidaten, index) if c != basis]
+
+
+def slot_bezeichnung(modell, slot):
+    # Fragetext ohne die <u>-Hervorhebungen des Fragebogens (Anzeige per Markdown ohne HTML)
+    if slot < len(modell.items):
+        return re.sub(r"</?u>", "", modell.items[slot].frage)
+    return antworten.DIREKT_VARIABLEN[slot - len(modell.items)]
+
+
+def stufe_bezeichnung(modell, slot, score):
+    # Antworttext bei Kriterien, Kategorienummer bei direkten Angaben
+    if slot < len(modell.items):
+        return modell.score_texte[score]
+    return f"Kategorie {score}"
@@ -0,0 +1,108 @@
+# Startprofil: Importzeiten und erster Seitenaufbau eines Serverprozesses
+#
+# Eingeschaltet über ARBEITSMODELL_STARTPROFIL=<Datei>. Dann misst der erste Skriptlauf
+# im Prozess, wie lange jeder Import von app.py (einschließlich der davon nachgeladenen
+# Module) und der erste Seitenaufbau dauern, und schreibt das als JSON in die Datei.
+# Spätere Reruns und Sessions messen nichts mehr; ausgeschaltet kostet das Modul nur
+# zwei Funktionsaufrufe pro Rerun.
+#
+# Beispiel (Zeit bis zur ersten Seite im Container):
+#   ARBEITSMODELL_STARTPROFIL=/tmp/startprofil.json streamlit run app.py
+#
+# Für eine Aufschlüsselung bis in einzelne Untermodule eignet sich zusätzlich
+# PYTHONPROFILEIMPORTTIME=1 (Ausgabe auf stderr).
+
+import builtins
+import json
+import logging
+import os
+import sys
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+DATEI = os.environ.get("ARBEITSMODELL_STARTPROFIL")
+
+_profil = None
+
+
+class _Importe:
+    # Ersetzt für die Dauer des with-Blocks builtins.__import__ und misst nur die Importe
+    # der obersten Ebene; nachgeladene Module zählen zu dem Import, der sie auslöst.
+    # Gemessen wird nur im Thread des Skriptlaufs; Importe anderer Threads (BatchWriter,
+    # Metriken) laufen unverändert durch und verfälschen weder Tiefe noch Zeiten.
+
+    def __init__(self, profil):
+        self._profil = profil
+        self._tiefe = 0
+
+    def __enter__(self):
+        self._thread = threading.get_ident()
+        self._original = builtins.__import__
+        builtins.__import__ = self._importieren
+        return self
+
+    def __exit__(self, *exc):
+        builtins.__import__ = self._original
+
+    def _importieren(self, name, globals=None, locals=None, fromlist=(), level=0):
+        if self._tiefe or threading.get_ident() != self._thread:
+            return self._original(name, globals, locals, fromlist, level)
+
+        self._tiefe += 1
+        module = len(sys.modules)
+        start = time.perf_counter()
+        try:
+            return self._original(name, globals, locals, fromlist, level)
+        finally:
+            self._tiefe -= 1
+            self._profil["importe"].append({
+                "modul": name,
+                "ms": round((time.perf_counter() - start) * 1000, 2),
+                "neue_module": len(sys.modules) - module,
+            })
+
+
+def beginn():
+    # Am Anfang von app.py; liefert einen Kontextmanager für die Importe
+    global _profil
+    if DATEI is None or _profil is not None:
+        return _Leer()
+
+    _profil = {
+        "pid": os.getpid(),
+        "start": time.perf_counter(),
+        "cpu_vorher": time.process_time(),
+        "module_vorher": len(sys.modules),
+        "importe": [],
+    }
+    return _Importe(_profil)
+
+
+def ende():
+    # Am Ende von app.py; schreibt das Profil nach dem ersten Seitenaufbau einmal weg
+    if DATEI is None or _profil is None or "erste_seite_ms" in _profil:
+        return
+
+    _profil["erste_seite_ms"] = round((time.perf_counter() - _profil.pop("start")) * 1000, 2)
+    _profil["importe_ms"] = round(sum(eintrag["ms"] for eintrag in _profil["importe"]), 2)
+    _profil["cpu_prozess_s"] = round(time.process_time(), 3)
+    _profil["module_nachher"] = len(sys.modules)
+    _profil["importe"].sort(key=lambda eintrag: eintrag["ms"], reverse=True)
+
+    try:
+        with open(DATEI, "w", encoding="utf-8") as f:
+            json.dump(_profil, f, indent=2, ensure_ascii=False)
+    except OSError:
+        logger.exception("Startprofil konnte nicht geschrieben werden")
+    logger.info("Startprofil: Importe %.0f ms, erste Seite %.0f ms",
+                _profil["importe_ms"], _profil["erste_seite_ms"])
+
+
+class _Leer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
@@ -0,0 +1,662 @@
+import atexit
+import hashlib
+import json
+import logging
+import os
+import math
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+
+import metriken
+
+logger = logging.getLogger(__name__)
+
+# Speicher-Backend: "sheets" (Standard), "sqlite", "parquet" oder "fake" (lokal, ohne Netzwerk)
+BACKEND = os.environ.get("ARBEITSMODELL_STORAGE", "sheets")
+SQLITE_PFAD = os.environ.get("ARBEITSMODELL_SQLITE_PFAD", os.path.join("daten", "submissions.sqlite"))
+PARQUET_DIR = os.environ.get("ARBEITSMODELL_PARQUET_DIR", os.path.join("daten", "submissions"))
+
+# HTTP-Codes, bei denen sich ein erneuter Versuch lohnt (Quota / Serverfehler)
+RETRY_CODES = (429, 500, 502, 503)
+
+
+def ist_quota_fehler(exc):
+    # gspread.exceptions.APIError trägt den HTTP-Status in "code"
+    return getattr(exc, "code", None) in RETRY_CODES
+
+
+# Gespeichertes Datenschema. Bei jeder Änderung der Spalten wird die Version erhöht.
+#   1: ITEM::<Fragetext>
+#   2: ITEM::<Item-Code> (z. B. ITEM::M1.1)
+SCHEMA_VERSION = 2
+
+# Platzhalter für fehlende Werte im Google Sheet (bisherige Konvention)
+FEHLWERT = 99999
+
+KAT_SPALTEN = [
+    "KAT::Anzahl CNC-Werkzeugmaschinen",
+    "KAT::Automatisierungsgrad",
+    "KAT::Losgröße",
+    "KAT::Laufzeit",
+    "KAT::Durchlaufzeit",
+]
+
+# Evaluationsfragen (Bereich 1–4) und Freitext
+EVAL_SPALTEN = [f"eval{i}_{j}" for i, anzahl in enumerate([3, 3, 4, 3], start=1) for j in range(anzahl)]
+
+
+class Schema:
+    # Explizite, versionierte Spaltenliste mit Typen ("REAL", "TEXT", "INTEGER").
+    # Zeilen werden als Dict übergeben und unabhängig von der Einfügereihenfolge
+    # in diese feste Reihenfolge gebracht.
+
+    def __init__(self, spalten, version=SCHEMA_VERSION):
+        self.version = version
+        self.spalten = tuple(name for name, _ in spalten)
+        self.typen = dict(spalten)
+
+    def normalisieren(self, daten):
+        zeile = {}
+        for name in self.spalten:
+            zeile[name] = _typisieren(daten.get(name), self.typen[name])
+        zeile["Schema_Version"] = self.version
+        return zeile
+
+
+def _typisieren(wert, typ):
+    if wert is None:
+        return None
+    if typ == "TEXT":
+        wert = str(wert)
+        return wert if wert.strip() else None
+    try:
+        wert = float(wert)
+    except (TypeError, ValueError):
+        return None
+    if math.isnan(wert) or wert == FEHLWERT:
+        return None
+    return int(wert) if typ == "INTEGER" else wert
+
+
+def baue_schema(item_codes, handlungsfelder, anzahl_cluster):
+    spalten = [(f"ITEM::{code}", "REAL") for code in item_codes]
+    spalten += [(name, "REAL") for name in KAT_SPALTEN]
+    spalten += [(feld, "REAL") for feld in handlungsfelder]
+    spalten += [("Zugeordnetes Cluster", "TEXT")]
+    spalten += [(f"Abweichung {i}", "REAL") for i in range(1, anzahl_cluster + 1)]
+    spalten += [(name, "REAL") for name in EVAL_SPALTEN]
+    spalten += [("feedback", "TEXT"), ("Zeitstempel", "TEXT"), ("Session_ID", "TEXT"), ("Status", "TEXT")]
+    spalten += [("Schema_Version", "INTEGER")]
+    return Schema(spalten)
+
+
+def item_code(spalte):
+    # "ITEM::M1.1 Beschäftigte zeigen ..." (Version 1) und "ITEM::M1.1" -> "M1.1"
+    return spalte[len("ITEM::"):].split(" ", 1)[0]
+
+
+def migrieren(zeile):
+    # Zeilen älterer Schema-Versionen (z. B. noch im Spool) auf die aktuelle Version bringen
+    if zeile.get("Schema_Version") == 1:
+        zeile = {
+            (f"ITEM::{item_code(name)}" if name.startswith("ITEM::") else name): wert
+            for name, wert in zeile.items()
+        }
+        zeile["Schema_Version"] = 2
+    return zeile
+
+
+class SheetsWorksheet:
+    # Schmale Hülle um das Google-Sheets-Tabellenblatt. Die Verbindung wird erst
+    # beim ersten Schreiben aufgebaut (im Writer-Thread), nicht beim Import.
+
+    def __init__(self, schema, service_account_info, spreadsheet_key, tabellenblatt):
+        self.schema = schema
+        self._service_account_info = service_account_info
+        self._spreadsheet_key = spreadsheet_key
+        self._tabellenblatt = tabellenblatt
+        self._worksheet = None
+        self._lock = threading.Lock()
+        # Session_ID -> Zeilennummer des Zwischenstands (nur für Zeilen dieses Prozesses)
+        self._zeilennummern = {}
+
+    def verbinden(self):
+        with self._lock:
+            if self._worksheet is None:
+                with metriken.messen("arbeitsmodell_worksheet_sekunden", phase="verbinden"):
+                    self._worksheet = self._verbinden()
+            return self._worksheet
+
+    def _verbinden(self):
+        # gspread/google-auth erst hier laden, nicht beim Start jedes Servers
+        import gspread
+        from google.oauth2.service_account import Credentials
+
+        # Authentifizierung mit aktuellem Scope
+        scope = ["https://www.googleapis.com/auth/spreadsheets"]
+        credentials = Credentials.from_service_account_info(self._service_account_info(), scopes=scope)
+        client = gspread.authorize(credentials)
+        spreadsheet = client.open_by_key(self._spreadsheet_key)
+        try:
+            worksheet = spreadsheet.worksheet(self._tabellenblatt)
+        except gspread.exceptions.WorksheetNotFound:
+            worksheet = spreadsheet.add_worksheet(self._tabellenblatt, rows=1000, cols=len(self.schema.spalten))
+
+        # Leeres Tabellenblatt bekommt die Kopfzeile des Schemas; eine abweichende
+        # Kopfzeile würde die Spalten verschieben und wird daher abgelehnt
+        kopf = worksheet.row_values(1)
+        if not kopf:
+            worksheet.append_row(list(self.schema.spalten))
+        elif tuple(kopf) != self.schema.spalten:
+            raise RuntimeError(
+                f"Kopfzeile von {self._tabellenblatt!r} passt nicht zu Schema-Version {self.schema.version}"
+            )
+        return worksheet
+
+    def _werte(self, zeile):
+        return [FEHLWERT if zeile.get(name) is None else zeile[name] for name in self.schema.spalten]
+
+    def append_rows(self, zeilen):
+        return self.verbinden().append_rows([self._werte(zeile) for zeile in zeilen])
+
+    def upsert_rows(self, zeilen):
+        # Zwischenstände je Session_ID überschreiben: bekannte Zeilen mit einem batch_update,
+        # neue per append_rows, deren Zeilennummern aus der Antwort gemerkt werden.
+        # Nach einem Neustart beginnt eine laufende Session daher eine neue Zeile.
+        from gspread.utils import a1_range_to_grid_range, rowcol_to_a1
+
+        worksheet = self.verbinden()
+        bekannt = [z for z in zeilen if z["Session_ID"] in self._zeilennummern]
+        neu = [z for z in zeilen if z["Session_ID"] not in self._zeilennummern]
+
+        # Gemerkte Zeilennummern vorher prüfen: nach Löschen, Sortieren oder Filtern im Blatt
+        # stünde dort eine andere Session, die sonst überschrieben würde
+        if bekannt:
+            spalte = rowcol_to_a1(1, self.schema.spalten.index("Session_ID") + 1).rstrip("0123456789")
+            session_ids = worksheet.batch_get([f"{spalte}:{spalte}"])[0]
+            verschoben = []
+            for zeile in bekannt:
+                nummer = self._zeilennummern[zeile["Session_ID"]]
+                if nummer > len(session_ids) or not session_ids[nummer - 1] or session_ids[nummer - 1][0] != zeile["Session_ID"]:
+                    verschoben.append(zeile)
+            if verschoben:
+                logger.warning("%d Zwischenstand-Zeilen nicht mehr an der gemerkten Position, werden neu angehängt",
+                               len(verschoben))
+                for zeile in verschoben:
+                    del self._zeilennummern[zeile["Session_ID"]]
+                bekannt = [z for z in bekannt if z["Session_ID"] in self._zeilennummern]
+                neu += verschoben
+
+        if bekannt:
+            letzte_spalte = len(self.schema.spalten)
+            worksheet.batch_update([
+                {
+                    "range": f"{rowcol_to_a1(nummer, 1)}:{rowcol_to_a1(nummer, letzte_spalte)}",
+                    "values": [self._werte(zeile)],
+                }
+                for zeile in bekannt
+                for nummer in [self._zeilennummern[zeile["Session_ID"]]]
+            ])
+        if neu:
+            antwort = worksheet.append_rows([self._werte(zeile) for zeile in neu])
+            bereich = antwort["updates"]["updatedRange"].split("!")[-1]
+            erste = a1_range_to_grid_range(bereich)["startRowIndex"] + 1
+            for nummer, zeile in enumerate(neu, start=erste):
+                self._zeilennummern[zeile["Session_ID"]] = nummer
+
+
+class SqliteBackend:
+    # Lokale SQLite-Datenbank (WAL-Modus) mit typisierten Spalten, eine Tabelle je Schema-Version
+
+    def __init__(self, schema, pfad=SQLITE_PFAD):
+        self.schema = schema
+        self.pfad = pfad
+        self.tabelle = f"submissions_v{schema.version}"
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _verbindung(self):
+        if self._conn is None:
+            if os.path.dirname(self.pfad):
+                os.makedirs(os.path.dirname(self.pfad), exist_ok=True)
+            conn = sqlite3.connect(self.pfad, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            spalten = ", ".join(f'"{name}" {self.schema.typen[name]}' for name in self.schema.spalten)
+            conn.execute(f"CREATE TABLE IF NOT EXISTS {self.tabelle} ({spalten})")
+            self._conn = conn
+        return self._conn
+
+    def append_rows(self, zeilen):
+        namen = self.schema.spalten
+        spalten = ", ".join(f'"{name}"' for name in namen)
+        sql = f"INSERT INTO {self.tabelle} ({spalten}) VALUES ({', '.join('?' * len(namen))})"
+        with self._lock:
+            conn = self._verbindung()
+            with conn:
+                conn.executemany(sql, [[zeile.get(name) for name in namen] for zeile in zeilen])
+
+    def upsert_rows(self, zeilen):
+        # Höchstens ein Zwischenstand je Session_ID; "Final"-Zeilen bleiben unberührt
+        namen = self.schema.spalten
+        spalten = ", ".join(f'"{name}"' for name in namen)
+        zuweisungen = ", ".join(f'"{name}" = ?' for name in namen)
+        update = f"""UPDATE {self.tabelle} SET {zuweisungen} WHERE "Session_ID" = ? AND "Status" = 'Zwischenstand'"""
+        insert = f"INSERT INTO {self.tabelle} ({spalten}) VALUES ({', '.join('?' * len(namen))})"
+        with self._lock:
+            conn = self._verbindung()
+            with conn:
+                for zeile in zeilen:
+                    werte = [zeile.get(name) for name in namen]
+                    if conn.execute(update, werte + [zeile["Session_ID"]]).rowcount == 0:
+                        conn.execute(insert, werte)
+
+    def lesen(self, batch_groesse=1000):
+        # Liefert gespeicherte Zeilen blockweise als Dicts (eigene Leseverbindung, WAL erlaubt paralleles Schreiben)
+        with self._lock:
+            self._verbindung()
+        conn = sqlite3.connect(self.pfad)
+        try:
+            cursor = conn.execute(f"SELECT * FROM {self.tabelle}")
+            namen = [d[0] for d in cursor.description]
+            while True:
+                block = cursor.fetchmany(batch_groesse)
+                if not block:
+                    return
+                yield [dict(zip(namen, werte)) for werte in block]
+        finally:
+            conn.close()
+
+
+class ParquetBackend:
+    # Append-only Parquet-Datensatz: jeder Batch wird als eigene Datei geschrieben.
+    # Benötigt das optionale Paket pyarrow.
+
+    def __init__(self, schema, verzeichnis=PARQUET_DIR):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError as e:
+            raise RuntimeError("Für ARBEITSMODELL_STORAGE=parquet wird das Paket 'pyarrow' benötigt.") from e
+
+        self.schema = schema
+        self.verzeichnis = os.path.join(verzeichnis, f"schema_v{schema.version}")
+        arrow_typen = {"REAL": pyarrow.float64(), "TEXT": pyarrow.string(), "INTEGER": pyarrow.int64()}
+        self._arrow_schema = pyarrow.schema(
+            [(name, arrow_typen[self.schema.typen[name]]) for name in self.schema.spalten]
+        )
+        self._pa = pyarrow
+        self._pq = pyarrow.parquet
+        os.makedirs(self.verzeichnis, exist_ok=True)
+
+    def append_rows(self, zeilen):
+        tabelle = self._pa.Table.from_pylist(list(zeilen), schema=self._arrow_schema)
+        name = f"part-{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}.parquet"
+        tmp = os.path.join(self.verzeichnis, "." + name)
+        self._pq.write_table(tabelle, tmp)
+        os.replace(tmp, os.path.join(self.verzeichnis, name))
+
+    def upsert_rows(self, zeilen):
+        # Parquet-Dateien sind unveränderlich: Zwischenstände werden angehängt (dank
+        # Zusammenfassung im BatchWriter selten), beim Lesen gilt der letzte je Session_ID
+        self.append_rows(zeilen)
+
+    def lesen(self, batch_groesse=1000):
+        import pyarrow.dataset
+
+        datensatz = pyarrow.dataset.dataset(self.verzeichnis, format="parquet", schema=self._arrow_schema)
+        for batch in datensatz.to_batches(batch_size=batch_groesse):
+            yield batch.to_pylist()
+
+
+class FakeQuotaError(Exception):
+    code = 429
+
+
+class FakeWorksheet:
+    # Lokaler Ersatz für Tests und Entwicklung: hält Zeilen im Speicher und kann
+    # Latenz und Quota-Fehler (jeder n-te Aufruf) simulieren.
+
+    def __init__(self, latenz=0.0, fehler_alle=0):
+        self.latenz = latenz
+        self.fehler_alle = fehler_alle
+        self.zeilen = []
+        self.aufrufe = 0
+        self._lock = threading.Lock()
+        self._zwischenstaende = {}  # Session_ID -> Index in zeilen
+
+    def _aufruf(self):
+        with self._lock:
+            self.aufrufe += 1
+            aufruf = self.aufrufe
+        if self.latenz:
+            time.sleep(self.latenz)
+        if self.fehler_alle and aufruf % self.fehler_alle == 0:
+            raise FakeQuotaError("Quota exceeded (simuliert)")
+
+    def append_rows(self, zeilen):
+        self._aufruf()
+        with self._lock:
+            self.zeilen.extend(dict(z) for z in zeilen)
+
+    def upsert_rows(self, zeilen):
+        self._aufruf()
+        with self._lock:
+            for zeile in zeilen:
+                index = self._zwischenstaende.get(zeile["Session_ID"])
+                if index is None:
+                    self._zwischenstaende[zeile["Session_ID"]] = len(self.zeilen)
+                    self.zeilen.append(dict(zeile))
+                else:
+                    self.zeilen[index] = dict(zeile)
+
+
+def erzeuge_backend(schema, service_account_info=None, backend=BACKEND):
+    if backend == "fake":
+        return FakeWorksheet()
+    if backend == "sqlite":
+        return SqliteBackend(schema)
+    if backend == "parquet":
+        return ParquetBackend(schema)
+    if backend == "sheets":
+        return SheetsWorksheet(
+            schema,
+            service_account_info,
+            "1pPljjp03HAB7KM_Qk9B4IYnnx0NVuFMxV81qvD67B3g",
+            # Ab Version 2 ein eigenes Tabellenblatt je Schema-Version
+            "Tabellenblatt1" if schema.version == 1 else f"Tabellenblatt1_v{schema.version}",
+        )
+    raise ValueError(f"Unbekanntes Speicher-Backend: {backend!r}")
+
+
+# Verzeichnis für das lokale Journal, per Umgebungsvariable konfigurierbar
+SPOOL_DIR = os.environ.get("ARBEITSMODELL_SPOOL_DIR", "spool")
+
+
+class Spool:
+    # Append-only Journal (JSONL): jede Zeile wird zuerst lokal gesichert und erst
+    # nach erfolgreicher Übertragung über (Session_ID, Zeitstempel) quittiert.
+
+    def __init__(self, verzeichnis=SPOOL_DIR):
+        os.makedirs(verzeichnis, exist_ok=True)
+        self._zeilen_pfad = os.path.join(verzeichnis, "zeilen.jsonl")
+        self._quittungen_pfad = os.path.join(verzeichnis, "quittiert.jsonl")
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _anhaengen(pfad, eintraege):
+        with open(pfad, "a", encoding="utf-8") as f:
+            for eintrag in eintraege:
+                f.write(json.dumps(eintrag, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    @staticmethod
+    def _lesen(pfad):
+        if not os.path.exists(pfad):
+            return []
+        eintraege = []
+        with open(pfad, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    eintraege.append(json.loads(line))
+                except ValueError:
+                    # Abgebrochene letzte Zeile nach einem Absturz ignorieren
+                    continue
+        return eintraege
+
+    def append(self, schluessel, zeile):
+        session_id, zeitstempel = schluessel
+        with self._lock:
+            self._anhaengen(self._zeilen_pfad, [{"Session_ID": session_id, "Zeitstempel": zeitstempel, "zeile": zeile}])
+
+    def ack(self, schluessel_liste):
+        with self._lock:
+            self._anhaengen(self._quittungen_pfad, [{"Session_ID": s, "Zeitstempel": z} for s, z in schluessel_liste])
+
+    def offene(self):
+        # Alle noch nicht quittierten Einträge in Schreibreihenfolge
+        with self._lock:
+            quittiert = {(q["Session_ID"], q["Zeitstempel"]) for q in self._lesen(self._quittungen_pfad)}
+            return [
+                ((e["Session_ID"], e["Zeitstempel"]), migrieren(e["zeile"]))
+                for e in self._lesen(self._zeilen_pfad)
+                if (e["Session_ID"], e["Zeitstempel"]) not in quittiert
+            ]
+
+    def kompaktieren(self):
+        # Journal auf die offenen Einträge kürzen, Quittungen zurücksetzen
+        offen = self.offene()
+        with self._lock:
+            tmp = self._zeilen_pfad + ".tmp"
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            self._anhaengen(tmp, [{"Session_ID": s, "Zeitstempel": z, "zeile": zeile} for (s, z), zeile in offen])
+            os.replace(tmp, self._zeilen_pfad)
+            if os.path.exists(self._quittungen_pfad):
+                os.remove(self._quittungen_pfad)
+        return offen
+
+
+def replay(spool, worksheet, batch_groesse=500):
+    # Nachträgliches Übertragen aller offenen Einträge, z. B. nach einem Ausfall
+    offen = spool.offene()
+    for start in range(0, len(offen), batch_groesse):
+        chunk = offen[start:start + batch_groesse]
+        worksheet.append_rows([zeile for _, zeile in chunk])
+        spool.ack([schluessel for schluessel, _ in chunk])
+    return len(offen)
+
+
+def inhalt_hash(zeile, ohne=("Zeitstempel",)):
+    # Hash über den Inhalt einer Zeile ohne den Zeitstempel, um unveränderte Stände zu erkennen
+    inhalt = json.dumps({k: v for k, v in zeile.items() if k not in ohne}, sort_keys=True, default=str)
+    return hashlib.sha256(inhalt.encode("utf-8")).digest()
+
+
+class BatchWriter:
+    # Prozessweiter Hintergrund-Schreiber: speichere_daten legt Zeilen nur in die
+    # Queue, ein Worker-Thread schreibt sie gesammelt per append_rows ins Sheet.
+    # Mit Spool wird jede Zeile vorher lokal gesichert; nicht übertragene Zeilen
+    # bleiben offen und werden später (auch nach einem Neustart) nachgeholt.
+    #
+    # Zwischenstände (zwischenstand()) laufen getrennt davon: je Session wird nur der
+    # jüngste noch nicht geschriebene Stand gehalten und höchstens alle
+    # zwischenstand_intervall Sekunden per upsert_rows (eine Zeile je Session_ID)
+    # übertragen. Stände mit unverändertem Inhalt werden gar nicht erst angenommen.
+    # Zwischenstände gehen nicht in den Spool: bei einem Absturz gehen die noch nicht
+    # übertragenen Stände (höchstens zwischenstand_intervall Sekunden) verloren, die
+    # Garantie des Spools gilt nur für die "Final"-Zeile.
+
+    def __init__(self, worksheet, spool=None, max_batch=50, max_wartezeit=2.0, max_versuche=6,
+                 backoff=1.0, nachhol_intervall=60.0, zwischenstand_intervall=10.0):
+        self._worksheet = worksheet
+        self._spool = spool
+        self.max_batch = max_batch
+        self.max_wartezeit = max_wartezeit
+        self.max_versuche = max_versuche
+        self.backoff = backoff
+        self.nachhol_intervall = nachhol_intervall
+        self.zwischenstand_intervall = zwischenstand_intervall
+
+        # Session_ID -> jüngster ausstehender Zwischenstand bzw. Hash des zuletzt angenommenen
+        self._zwischenstaende = {}
+        self._zwischenstand_hashes = {}
+        self._zwischenstand_faellig = None
+        self._zwischenstand_lock = threading.Lock()
+
+        # Offene Einträge aus einem früheren Lauf zuerst übertragen
+        self._rueckstand = spool.kompaktieren() if spool is not None else []
+
+        self._queue = queue.Queue()
+        self._stop = object()
+        self._wecken = object()
+        self._geschlossen = False
+        self._thread = threading.Thread(target=self._run, name="sheets-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def submit(self, schluessel, zeile):
+        if self._geschlossen:
+            raise RuntimeError("BatchWriter ist bereits geschlossen.")
+        if self._spool is not None:
+            self._spool.append(schluessel, zeile)
+        self._queue.put((schluessel, zeile))
+
+        # Ein noch ausstehender Zwischenstand würde nach der finalen Zeile geschrieben und
+        # entfällt; einen Vergleichswert braucht die Session nicht mehr
+        with self._zwischenstand_lock:
+            self._zwischenstaende.pop(schluessel[0], None)
+            self._zwischenstand_hashes.pop(schluessel[0], None)
+            # Ohne ausstehende Stände kein Zeitfenster, sonst wartet der Worker nicht mehr
+            if not self._zwischenstaende:
+                self._zwischenstand_faellig = None
+
+    def zwischenstand(self, zeile):
+        # Liefert False, wenn sich der Inhalt seit dem letzten Zwischenstand nicht geändert hat
+        if self._geschlossen:
+            raise RuntimeError("BatchWriter ist bereits geschlossen.")
+        session_id = zeile["Session_ID"]
+        kennung = inhalt_hash(zeile)
+
+        with self._zwischenstand_lock:
+            if self._zwischenstand_hashes.get(session_id) == kennung:
+                metriken.zaehlen("arbeitsmodell_zwischenstand_total", ergebnis="unveraendert")
+                return False
+            self._zwischenstand_hashes[session_id] = kennung
+            if session_id in self._zwischenstaende:
+                metriken.zaehlen("arbeitsmodell_zwischenstand_total", ergebnis="ersetzt")
+            self._zwischenstaende[session_id] = zeile
+            # Der erste ausstehende Stand öffnet das Zeitfenster und weckt den Worker
+            wecken = self._zwischenstand_faellig is None
+            if wecken:
+                self._zwischenstand_faellig = time.monotonic() + self.zwischenstand_intervall
+
+        if wecken:
+            self._queue.put(self._wecken)
+        return True
+
+    def close(self, timeout=30.0):
+        # Restliche Zeilen beim Herunterfahren noch wegschreiben
+        if self._geschlossen:
+            return
+        self._geschlossen = True
+        self._queue.put(self._stop)
+        self._thread.join(timeout)
+
+    def _wartezeit(self):
+        # Mit Rückstand bzw. ausstehenden Zwischenständen nur begrenzt auf die Queue warten
+        fristen = [self.nachhol_intervall] if self._rueckstand else []
+        with self._zwischenstand_lock:
+            if self._zwischenstand_faellig is not None:
+                fristen.append(max(0.0, self._zwischenstand_faellig - time.monotonic()))
+        return min(fristen) if fristen else None
+
+    def _run(self):
+        while True:
+            if self._rueckstand:
+                self._nachholen()
+            self._zwischenstaende_schreiben()
+            try:
+                erstes = self._queue.get(timeout=self._wartezeit())
+            except queue.Empty:
+                continue
+            if erstes is self._wecken:
+                continue
+            if erstes is self._stop:
+                self._nachholen()
+                self._zwischenstaende_schreiben(alle=True)
+                return
+
+            batch = [erstes]
+            deadline = time.monotonic() + self.max_wartezeit
+            stop = False
+
+            # Sammeln bis Batchgröße erreicht oder Zeitfenster abgelaufen
+            while len(batch) < self.max_batch:
+                rest = deadline - time.monotonic()
+                if rest <= 0:
+                    break
+                try:
+                    zeile = self._queue.get(timeout=rest)
+                except queue.Empty:
+                    break
+                if zeile is self._wecken:
+                    continue
+                if zeile is self._stop:
+                    stop = True
+                    break
+                batch.append(zeile)
+
+            if not self._flush(batch):
+                self._rueckstand.extend(batch)
+            if stop:
+                self._nachholen()
+                self._zwischenstaende_schreiben(alle=True)
+                return
+
+    def _nachholen(self):
+        rueckstand, self._rueckstand = self._rueckstand, []
+        for start in range(0, len(rueckstand), self.max_batch):
+            batch = rueckstand[start:start + self.max_batch]
+            if not self._flush(batch):
+                self._rueckstand.extend(rueckstand[start:])
+                return
+
+    def _zwischenstaende_schreiben(self, alle=False):
+        # Ausstehende Zwischenstände nach Ablauf des Zeitfensters (bzw. beim Beenden) übertragen
+        with self._zwischenstand_lock:
+            if not self._zwischenstaende:
+                self._zwischenstand_faellig = None
+                return
+            if not alle and time.monotonic() < self._zwischenstand_faellig:
+                return
+            zeilen = list(self._zwischenstaende.values())
+            self._zwischenstaende = {}
+            self._zwischenstand_faellig = None
+
+        for start in range(0, len(zeilen), self.max_batch):
+            if not self._uebertragen(self._worksheet.upsert_rows, zeilen[start:start + self.max_batch]):
+                # Für das nächste Fenster vormerken, sofern inzwischen weder ein neuerer Stand
+                # noch die finale Zeile (Hash entfernt) vorliegt
+                with self._zwischenstand_lock:
+                    for zeile in zeilen[start:]:
+                        if zeile["Session_ID"] in self._zwischenstand_hashes:
+                            self._zwischenstaende.setdefault(zeile["Session_ID"], zeile)
+                    if self._zwischenstaende and self._zwischenstand_faellig is None:
+                        self._zwischenstand_faellig = time.monotonic() + self.zwischenstand_intervall
+                return
+        metriken.zaehlen("arbeitsmodell_zwischenstand_total", len(zeilen), ergebnis="geschrieben")
+
+    def _flush(self, batch):
+        if not self._uebertragen(self._worksheet.append_rows, [zeile for _, zeile in batch]):
+            return False
+        if self._spool is not None:
+            self._spool.ack([schluessel for schluessel, _ in batch])
+        return True
+
+    def _uebertragen(self, methode, zeilen):
+        for versuch in range(1, self.max_versuche + 1):
+            start = time.perf_counter()
+            try:
+                methode(zeilen)
+            except Exception as e:
+                art = "quota" if ist_quota_fehler(e) else "fehler"
+                metriken.beobachten("arbeitsmodell_speichern_sekunden", time.perf_counter() - start,
+                                    ergebnis=art, methode=methode.__name__)
+                metriken.zaehlen("arbeitsmodell_speichern_fehler_total", art=art)
+                if versuch == self.max_versuche or not ist_quota_fehler(e):
+                    logger.error("Speichern von %d Zeilen (%s) fehlgeschlagen: %s", len(zeilen), methode.__name__, e)
+                    return False
+                # Exponentielles Backoff bei Quota-Fehlern
+                wartezeit = self.backoff * 2 ** (versuch - 1)
+                logger.warning("Sheets-Quota erreicht, neuer Versuch in %.1f s (%s)", wartezeit, e)
+                time.sleep(wartezeit)
+                continue
+
+            metriken.beobachten("arbeitsmodell_speichern_sekunden", time.perf_counter() - start,
+                                ergebnis="ok", methode=methode.__name__)
+            metriken.zaehlen("arbeitsmodell_speichern_zeilen_total", len(zeilen), methode=methode.__name__)
+            return True
@@ -0,0 +1,6 @@
+import os
+import sys
+
+# Module der App liegen im Wurzelverzeichnis des Repos
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("ARBEITSMODELL_STORAGE", "fake")
@@ -0,0 +1,78 @@
+import numpy as np
+
+import antworten
+from modell import lade_modell
+from scoring import MIN_CLUSTER_VARS_SCORED, ClusterEngine, direct_input_keys
+
+
+def zuordnung_einzeln(modell, vektor):
+    # Berechnung wie berechne_clusterzuordnung vor der ClusterEngine: ein Befragter,
+    # Dictionaries und Python-Schleifen; liefert (Cluster oder None, Abweichungen, Variablenwerte)
+    item_scores = {item.code: int(vektor[item.id]) for item in modell.items
+                   if vektor[item.id] != antworten.UNBEANTWORTET}
+
+    werte = {}
+    for slot, variable in enumerate(direct_input_keys):
+        wert = vektor[len(modell.items) + slot]
+        werte[variable] = float(wert) if wert != antworten.UNBEANTWORTET else float("nan")
+
+    for variable, codes in modell.variablen.items():
+        if variable in direct_input_keys:
+            continue
+        scores = [item_scores[code] for code in codes if code in item_scores]
+        if scores:
+            mittel = np.mean(scores)
+            werte[variable] = 5 - mittel if variable in ["Aufwand Zeit", "Aufwand Mobil", "Prozessinstabilität"] else mittel
+        else:
+            werte[variable] = float("nan")
+
+    werte = {k: v for k, v in werte.items() if not np.isnan(v)}
+    if len(werte) < MIN_CLUSTER_VARS_SCORED:
+        return None, {}, werte
+
+    abweichungen = {}
+    for name, cluster in modell.cluster.items():
+        diffs = [abs(wert - cluster.profil[variable]) for variable, wert in werte.items() if variable in cluster.profil]
+        abweichungen[name] = np.mean(diffs) if diffs else float("inf")
+    if all(v == float("inf") for v in abweichungen.values()):
+        return None, {}, werte
+    return min(abweichungen, key=abweichungen.get), abweichungen, werte
+
+
+def zufaellige_antworten(modell, anzahl, rng):
+    # Je Befragtem ein eigener Anteil unbeantworteter Slots (0 bis 95 %), damit auch
+    # Zuordnungen mit zu wenigen Variablen vorkommen
+    vektoren = np.zeros((anzahl, len(modell.items) + len(direct_input_keys)), dtype=np.int8)
+    for item in modell.items:
+        stufen = sorted({modell.antwortskala[o] for o in item.optionen})
+        vektoren[:, item.id] = rng.choice(stufen, anzahl)
+    vektoren[:, len(modell.items):] = rng.integers(1, 5, (anzahl, len(direct_input_keys)))
+    leer = rng.random(vektoren.shape) < rng.uniform(0, 0.95, (anzahl, 1))
+    vektoren[leer] = antworten.UNBEANTWORTET
+    return vektoren
+
+
+def test_engine_entspricht_einzelberechnung():
+    modell = lade_modell()
+    engine = ClusterEngine(modell.codes)
+    vektoren = zufaellige_antworten(modell, 500, np.random.default_rng(20240601))
+
+    item_scores, beantwortet = antworten.item_scores(vektoren, modell)
+    zuordnung = engine.zuordnen(item_scores, antworten.direkt_werte(vektoren, modell), beantwortet)
+
+    ohne_zuordnung = 0
+    for n, vektor in enumerate(vektoren):
+        cluster, abweichungen, werte = zuordnung_einzeln(modell, vektor)
+        if cluster is None:
+            ohne_zuordnung += 1
+            assert zuordnung.cluster_index[n] == -1
+            continue
+
+        assert engine.cluster_namen[zuordnung.cluster_index[n]] == cluster
+        # Bitgleich, nicht nur näherungsweise
+        assert zuordnung.abweichungen[n].tolist() == [abweichungen[name] for name in engine.cluster_namen]
+        berechnet = {v: w for v, w in zip(engine.variablen, zuordnung.werte[n].tolist()) if not np.isnan(w)}
+        assert berechnet == werte
+
+    # Beide Zweige müssen vorkommen
+    assert 0 < ohne_zuordnung < len(vektoren)
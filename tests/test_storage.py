@@ -0,0 +1,64 @@
+import threading
+import time
+
+import storage
+
+
+def zeile(session_id, status="Zwischenstand", wert=1):
+    return {"Session_ID": session_id, "Zeitstempel": str(time.time()), "Status": status, "Wert": wert}
+
+
+def warten_bis(bedingung, timeout=5.0):
+    ende = time.monotonic() + timeout
+    while time.monotonic() < ende:
+        if bedingung():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_final_verdraengt_zwischenstand_ohne_offenes_zeitfenster():
+    worksheet = storage.FakeWorksheet()
+    writer = storage.BatchWriter(worksheet, max_wartezeit=0.05, zwischenstand_intervall=0.2)
+    try:
+        assert writer.zwischenstand(zeile("a"))
+        writer.submit(("a", "t"), zeile("a", "Final"))
+        assert writer._wartezeit() is None
+
+        # Auch nach Ablauf des Fensters wartet der Worker wieder blockierend auf die Queue
+        time.sleep(0.3)
+        assert writer._wartezeit() is None
+        assert warten_bis(lambda: len(worksheet.zeilen) == 1)
+        assert [z["Status"] for z in worksheet.zeilen] == ["Final"]
+    finally:
+        writer.close()
+
+
+class FinalWaehrendUpsert(storage.FakeWorksheet):
+    # upsert_rows schlägt fehl, nachdem alle Sessions des Batches ihre finale Zeile abgegeben haben
+
+    def __init__(self):
+        super().__init__()
+        self.writer = None
+        self.upsert_versucht = threading.Event()
+
+    def upsert_rows(self, zeilen):
+        for z in zeilen:
+            self.writer.submit((z["Session_ID"], "t"), zeile(z["Session_ID"], "Final"))
+        self.upsert_versucht.set()
+        raise RuntimeError("upsert fehlgeschlagen")
+
+
+def test_fehlgeschlagener_upsert_ohne_ausstehende_staende_oeffnet_kein_zeitfenster():
+    worksheet = FinalWaehrendUpsert()
+    writer = storage.BatchWriter(worksheet, max_wartezeit=0.05, max_versuche=1, zwischenstand_intervall=0.05)
+    worksheet.writer = writer
+    try:
+        writer.zwischenstand(zeile("a"))
+        writer.zwischenstand(zeile("b"))
+        assert worksheet.upsert_versucht.wait(5.0)
+        assert warten_bis(lambda: len(worksheet.zeilen) == 2)
+        assert writer._zwischenstaende == {}
+        assert writer._wartezeit() is None
+    finally:
+        writer.close()
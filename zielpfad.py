@@ -0,0 +1,251 @@
+# Weg zu einem Zielcluster
+#
+# suchen() bestimmt die kleinste Menge geänderter Kriterien-Antworten, nach der die mittlere
+# Abweichung zum Profil des Zielclusters kleiner ist als zu allen anderen Clustern.
+#
+# Zustand der Suche sind die Summen der Itemwerte je Cluster-Variable: eine Änderung von
+# Item i von Stufe a auf b verschiebt sie um gewichte[:, i] * (b - a), alle möglichen
+# Änderungen eines Zustands werden so in einem NumPy-Aufruf bewertet. Die Anzahl der
+# bewerteten Variablen bleibt dabei gleich, weil nur beantwortete Kriterien geändert werden
+# (direkte Angaben wie die Maschinenzahl gelten als nicht veränderbar).
+#   1. Greedy: jeweils die Änderung mit dem größten Abstand zugunsten des Ziels
+#   2. Branch-and-Bound mit iterativer Vertiefung bis unter die Greedy-Lösung; eine Änderung
+#      kann den Abstand höchstens um 2 · Σ|Δ Variablenwert| / Anzahl Variablen verbessern,
+#      Zweige, die damit das Ziel nicht mehr erreichen können, entfallen
+# Reicht das Zeitbudget nicht, bleibt es bei der besten bis dahin gefundenen Lösung
+# (minimal=False).
+#
+# Zu jeder Änderung werden die passenden Handlungsempfehlungen des Zielclusters
+# (gleiche MTOK-Dimension, nach Wortüberschneidung mit der Frage geordnet) mitgegeben.
+
+import re
+import time
+
+import numpy as np
+
+import antworten
+from scoring import mittlere_abweichungen
+
+BUDGET = 0.5
+MAX_AENDERUNGEN = 8
+
+# Mindestabstand, damit die Zuordnung auch bei Rundungsunterschieden eindeutig ist
+EPSILON = 1e-9
+
+
+class Aenderung:
+    # Nur einfache Werte, damit das Ergebnis (z. B. für st.cache_data) picklebar bleibt
+    __slots__ = ("item_id", "von", "nach", "empfehlungen")
+
+    def __init__(self, item_id, von, nach, empfehlungen):
+        self.item_id = item_id            # Item-ID (Slot im Antwortvektor)
+        self.von = von                    # bisheriger Score
+        self.nach = nach                  # vorgeschlagener Score
+        self.empfehlungen = empfehlungen  # passende Empfehlungen des Zielclusters als (Text, Bemerkung)
+
+
+class Zielpfad:
+    __slots__ = ("ziel", "aenderungen", "abweichungen", "erreicht", "minimal", "dauer")
+
+    def __init__(self, ziel, aenderungen, abweichungen, erreicht, minimal, dauer):
+        self.ziel = ziel
+        self.aenderungen = aenderungen    # [Aenderung]
+        self.abweichungen = abweichungen  # Cluster -> Abweichung nach den Änderungen
+        self.erreicht = erreicht          # Zielcluster wird danach zugeordnet
+        self.minimal = minimal            # Suche vollständig: keine kleinere Lösung bzw. keine mit
+                                          # höchstens max_aenderungen Änderungen
+        self.dauer = dauer
+
+
+class _Abbruch(Exception):
+    pass
+
+
+class _Suche:
+    def __init__(self, engine, modell, vektor, ziel_index):
+        self.engine = engine
+        self.ziel = ziel_index
+        item_scores, beantwortet = antworten.item_scores(vektor, modell)
+        self.direkt = antworten.direkt_werte(vektor, modell)
+
+        scores = np.where(beantwortet, item_scores, 0.0)
+        self.summen = engine.gewichte @ scores
+        self.anzahl = engine.gewichte @ beantwortet.astype(float)
+        bewertet = (self.anzahl > 0).sum() + (~np.isnan(self.direkt)).sum()
+
+        # Alle Einzeländerungen beantworteter Items, die mindestens eine Variable betreffen
+        wirksam = beantwortet & (engine.gewichte.sum(axis=0) > 0)
+        zuege = []
+        for item in modell.items:
+            if not wirksam[item.id]:
+                continue
+            von = int(vektor[item.id])
+            for nach in sorted({modell.antwortskala[o] for o in item.optionen} - {von}):
+                zuege.append((item.id, von, nach))
+        self.zuege = zuege
+        self.zug_item = np.array([z[0] for z in zuege], dtype=np.intp)
+        schritte = np.array([z[2] - z[1] for z in zuege], dtype=float)
+        self.delta = (engine.gewichte[:, self.zug_item] * schritte).T if zuege else np.zeros((0, len(self.summen)))
+
+        # Obergrenze der Verbesserung des Abstands je Zug
+        with np.errstate(invalid="ignore", divide="ignore"):
+            aenderung_werte = np.where(self.anzahl > 0, np.abs(self.delta) / self.anzahl, 0.0)
+        self.grenze = 2 * aenderung_werte.sum(axis=1) / max(bewertet, 1)
+
+        # Erreichbarer Bereich jeder Item-Variable, wenn alle beantworteten Items frei wählbar wären
+        stufen = np.array([[min(modell.antwortskala[o] for o in item.optionen),
+                            max(modell.antwortskala[o] for o in item.optionen)] for item in modell.items], dtype=float)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            bereich = (engine.gewichte @ np.where(beantwortet[:, None], stufen, 0.0)) / self.anzahl[:, None]
+        bereich = np.where(engine.invertiert[:, None], 5 - bereich[:, ::-1], bereich)
+        self.bereich = bereich
+        self.bewertet = bewertet
+
+    def obergrenze(self):
+        # Größter überhaupt erreichbarer Abstand (ohne Kopplung gemeinsamer Items): für jedes andere
+        # Cluster c wird Σ (|x - p_c| - |x - p_ziel|) je Variable für sich über ihren Bereich maximiert
+        profile = self.engine.profile
+        ziel = profile[self.ziel]
+        anzahl_direkt = len(self.direkt)
+        bewertet_direkt = ~np.isnan(self.direkt)
+        aktiv = self.anzahl > 0
+        lo, hi = self.bereich[aktiv, 0], self.bereich[aktiv, 1]
+
+        grenzen = []
+        for c in range(len(profile)):
+            if c == self.ziel:
+                continue
+            direkt = np.abs(self.direkt - profile[c, :anzahl_direkt]) - np.abs(self.direkt - ziel[:anzahl_direkt])
+            p_c, p_z = profile[c, anzahl_direkt:][aktiv], ziel[anzahl_direkt:][aktiv]
+            # Stückweise linear: Maximum an den Bereichsgrenzen oder den (begrenzten) Profilwerten
+            punkte = np.stack([lo, hi, np.clip(p_c, lo, hi), np.clip(p_z, lo, hi)])
+            gewinn = (np.abs(punkte - p_c) - np.abs(punkte - p_z)).max(axis=0)
+            grenzen.append((direkt[bewertet_direkt].sum() + gewinn.sum()) / max(self.bewertet, 1))
+        return min(grenzen)
+
+    def abweichungen(self, summen):
+        # summen: (M, Item-Variablen) -> (M, Cluster)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mittel = summen / self.anzahl
+        mittel[:, self.anzahl == 0] = np.nan
+        mittel = np.where(self.engine.invertiert, 5 - mittel, mittel)
+        werte = np.concatenate([np.broadcast_to(self.direkt, (len(summen), len(self.direkt))), mittel], axis=1)
+        return mittlere_abweichungen(werte, self.engine.profile)
+
+    def abstand(self, abweichungen):
+        # Kleinste Abweichung eines anderen Clusters minus Abweichung des Ziels (> 0: Ziel wird zugeordnet)
+        andere = np.delete(abweichungen, self.ziel, axis=-1)
+        return andere.min(axis=-1) - abweichungen[..., self.ziel]
+
+    def greedy(self, max_aenderungen):
+        summen = self.summen
+        abstand = float(self.abstand(self.abweichungen(summen[None, :]))[0])
+        gewaehlt = []
+        frei = np.ones(len(self.zuege), dtype=bool)
+        while abstand <= EPSILON and len(gewaehlt) < max_aenderungen and frei.any():
+            kandidaten = np.flatnonzero(frei)
+            abstaende = self.abstand(self.abweichungen(summen + self.delta[kandidaten]))
+            bester = int(np.argmax(abstaende))
+            if abstaende[bester] <= abstand:
+                break
+            zug = int(kandidaten[bester])
+            gewaehlt.append(zug)
+            summen = summen + self.delta[zug]
+            abstand = float(abstaende[bester])
+            frei &= self.zug_item != self.zug_item[zug]
+        return gewaehlt, abstand
+
+    def branch_and_bound(self, tiefe, frist):
+        # Beste Lösung mit genau tiefe Zügen (größter Abstand) oder None
+        abstaende = self.abstand(self.abweichungen(self.summen + self.delta))
+        ordnung = np.argsort(-abstaende)  # vielversprechende Züge zuerst
+        delta = self.delta[ordnung]
+        grenze = self.grenze[ordnung]
+        items = self.zug_item[ordnung]
+        beste = [None, EPSILON]
+
+        def suchen(summen, abstand, start, rest, gewaehlt, benutzt):
+            if time.perf_counter() > frist:
+                raise _Abbruch
+            # Auch die größten möglichen Verbesserungen reichen nicht mehr
+            if abstand + np.sort(grenze[start:])[::-1][:rest].sum() <= beste[1]:
+                return
+            if rest == 1:
+                kandidaten = np.arange(start, len(items))
+                kandidaten = kandidaten[~np.isin(items[kandidaten], benutzt)]
+                if not len(kandidaten):
+                    return
+                abstaende = self.abstand(self.abweichungen(summen + delta[kandidaten]))
+                bester = int(np.argmax(abstaende))
+                if abstaende[bester] > beste[1]:
+                    beste[0] = gewaehlt + [int(kandidaten[bester])]
+                    beste[1] = float(abstaende[bester])
+                return
+            # Alle Folgezustände dieses Knotens auf einmal bewerten
+            positionen = np.arange(start, len(items) - rest + 1)
+            positionen = positionen[~np.isin(items[positionen], benutzt)]
+            if not len(positionen):
+                return
+            folge = summen + delta[positionen]
+            folge_abstaende = self.abstand(self.abweichungen(folge))
+            for position, neu, neu_abstand in zip(positionen, folge, folge_abstaende):
+                suchen(neu, float(neu_abstand), position + 1, rest - 1,
+                       gewaehlt + [int(position)], benutzt + [items[position]])
+
+        start_abstand = float(self.abstand(self.abweichungen(self.summen[None, :]))[0])
+        suchen(self.summen, start_abstand, 0, tiefe, [], [])
+        return None if beste[0] is None else [int(ordnung[p]) for p in beste[0]]
+
+
+_WORT = re.compile(r"\w{5,}")
+
+
+def _stamm(text):
+    return {wort[:6].lower() for wort in _WORT.findall(text)}
+
+
+def passende_empfehlungen(cluster, item, anzahl=2):
+    # Empfehlungen des Clusters in der Dimension des Items, nach gemeinsamen Wortstämmen geordnet
+    kandidaten = cluster.empfehlungen.get(item.dimension, ())
+    frage = _stamm(item.frage)
+    geordnet = sorted(kandidaten, key=lambda e: -len(frage & _stamm(e.text + " " + e.bemerkung)))
+    return tuple(geordnet[:anzahl])
+
+
+def suchen(engine, modell, vektor, ziel, max_aenderungen=MAX_AENDERUNGEN, budget=BUDGET):
+    start = time.perf_counter()
+    ziel_index = engine.cluster_namen.index(ziel)
+    suche = _Suche(engine, modell, vektor, ziel_index)
+
+    gewaehlt, abstand = suche.greedy(max_aenderungen)
+    erreicht = abstand > EPSILON
+    minimal = erreicht and len(gewaehlt) <= 1
+    if not erreicht and suche.obergrenze() <= EPSILON:
+        # Mit den Kriterien allein nicht erreichbar (z. B. wegen der direkten Angaben)
+        minimal = True
+    elif not minimal:
+        # Kleinere Lösungen als die Greedy-Lösung suchen (bzw. überhaupt eine, wenn Greedy stecken bleibt)
+        hoechstens = len(gewaehlt) if erreicht else max_aenderungen + 1
+        try:
+            for tiefe in range(1, hoechstens):
+                kleiner = suche.branch_and_bound(tiefe, start + budget)
+                if kleiner is not None:
+                    gewaehlt, erreicht = kleiner, True
+                    break
+            minimal = True
+        except _Abbruch:
+            pass
+    if not erreicht:
+        gewaehlt = []
+
+    cluster = modell.cluster[ziel]
+    aenderungen = []
+    summen = suche.summen.copy()
+    for zug in sorted(gewaehlt, key=lambda z: suche.zuege[z][0]):
+        item_id, von, nach = suche.zuege[zug]
+        item = modell.items[item_id]
+        empfehlungen = tuple((e.text, e.bemerkung) for e in passende_empfehlungen(cluster, item))
+        aenderungen.append(Aenderung(item_id, von, nach, empfehlungen))
+        summen += suche.delta[zug]
+    abweichungen = dict(zip(engine.cluster_namen, suche.abweichungen(summen[None, :])[0].tolist()))
+    return Zielpfad(ziel, aenderungen, abweichungen, erreicht, minimal, time.perf_counter() - start)